@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Encoder throughput benchmark
+
+Encodes a short reference clip with every available encoder plugin across its preset / speed ladder and records
+the frames per second, wall time, CPU time, peak memory and output size of each run as a JSON report.
+A previous report can be passed in to see what got faster or slower, for example after upgrading FFmpeg.
+
+    fastflix-benchmark --duration 10 --output benchmark.json --compare previous.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from subprocess import DEVNULL, Popen
+
+from appdirs import user_data_dir
+
+from fastflix.encoders import load_plugins
+from fastflix.flix import Flix, FlixError
+from fastflix.version import __version__
+
+logger = logging.getLogger("fastflix-core")
+
+__all__ = ["ladders", "run_benchmark", "compare_reports", "main"]
+
+x26x_presets = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower"]
+
+# Plugin name: (setting that is stepped through, its values, settings that stay the same for every step)
+ladders = {
+    "HEVC (x265)": ("preset", x26x_presets, dict(crf=28)),
+    "AVC (x264)": ("preset", x26x_presets, dict(crf=23)),
+    "VP9": ("speed", [0, 1, 2, 3, 4], dict(crf=31, single_pass=True, row_mt=1)),
+    "AV1 (AOM)": ("cpu_used", [4, 5, 6, 7, 8], dict(crf=30, row_mt=1)),
+    "AV1 (rav1e)": ("speed", [4, 6, 8, 10], dict(single_pass=True)),
+    "AV1 (SVT AV1)": ("speed", [4, 5, 6, 7, 8], dict(single_pass=True)),
+    "GIF": ("fps", [10, 15, 24], dict()),
+}
+
+
+def run_command(command, work_dir, log_file):
+    """Run a single command to completion, returning wall seconds, CPU seconds, peak RSS bytes and return code"""
+    started = time.perf_counter()
+    with open(log_file, "a", encoding="utf-8") as log:
+        log.write(f"{command}\n")
+        log.flush()
+        process = Popen(shlex.split(command), cwd=work_dir, stdin=DEVNULL, stdout=DEVNULL, stderr=log)
+        if not hasattr(os, "wait4"):
+            # Resource usage of a child is only available on unix like systems
+            return_code = process.wait()
+            return time.perf_counter() - started, None, None, return_code
+        _, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - started
+    return_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    process.returncode = return_code
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return wall_time, usage.ru_utime + usage.ru_stime, peak_rss, return_code
+
+
+def create_reference(flix, work_dir, source=None, pattern="testsrc2", size="1280x720", rate=30, duration=10):
+    """
+    Write the clip every plugin encodes to a lossless file, either the start of a source video or a synthetic
+    lavfi pattern, so decoding it costs the same for every run. Returns the file and its number of frames.
+    """
+    reference = Path(work_dir, "reference.mkv")
+    if source:
+        input_options = f'-t {duration} -i "{source}" -map 0:v:0'
+    else:
+        input_options = f'-f lavfi -i "{pattern}=size={size}:rate={rate}:duration={duration}"'
+    result = flix.execute(f'"{flix.ffmpeg}" -y {input_options} -an -sn -dn -c:v ffv1 -pix_fmt yuv420p "{reference}"')
+    if result.returncode != 0:
+        raise FlixError(f"Could not create reference clip: {result.stderr.decode('utf-8', errors='ignore')}")
+    result = flix.execute(
+        f'"{flix.ffprobe}" -v error -select_streams v:0 -count_packets '
+        f'-show_entries stream=nb_read_packets -of csv=p=0 "{reference}"'
+    )
+    try:
+        frames = int(result.stdout.decode("utf-8").strip())
+    except ValueError:
+        raise FlixError(f"Could not count the frames of the reference clip: {result.stderr.decode('utf-8')}")
+    return reference, frames
+
+
+def benchmark_plugin(plugin, reference, frames, flix, work_dir, log_file):
+    setting, values, fixed = ladders[plugin.name]
+    results = []
+    for value in values:
+        output_video = Path(work_dir, f"benchmark_{setting}_{value}.{plugin.video_extension}")
+        commands = plugin.build(
+            source=str(reference),
+            video_track=0,
+            ffmpeg=flix.ffmpeg,
+            temp_dir=work_dir,
+            output_video=str(output_video),
+            pix_fmt="yuv420p",
+            remove_metadata=True,
+            copy_chapters=False,
+            fast_time=True,
+            **{**fixed, setting: value},
+        )
+        result = dict(plugin=plugin.name, setting=setting, value=value, frames=frames)
+        wall_time, cpu_time, peak_rss, return_code = 0, 0, 0, 0
+        for command in commands:
+            if command.item != "command":
+                continue
+            logger.info(f"{plugin.name} {setting}={value}: {command.name or 'command'}")
+            for path, content in getattr(command, "files", {}).items():
+                Path(path).write_text(content, encoding="utf-8")
+            run_wall, run_cpu, run_rss, return_code = run_command(command.command, work_dir, log_file)
+            wall_time += run_wall
+            cpu_time = None if run_cpu is None or cpu_time is None else cpu_time + run_cpu
+            peak_rss = None if run_rss is None or peak_rss is None else max(peak_rss, run_rss)
+            if return_code:
+                break
+        result.update(
+            return_code=return_code,
+            wall_time=round(wall_time, 3),
+            cpu_time=None if cpu_time is None else round(cpu_time, 3),
+            peak_rss=peak_rss,
+            fps=round(frames / wall_time, 2) if wall_time and not return_code else None,
+            output_size=output_video.stat().st_size if output_video.exists() and not return_code else None,
+        )
+        if return_code:
+            logger.error(f"{plugin.name} {setting}={value} failed with code {return_code}, see {log_file}")
+        results.append(result)
+        try:
+            output_video.unlink()
+        except OSError:
+            pass
+    return results
+
+
+def run_benchmark(
+    flix, plugins, work_dir, source=None, pattern="testsrc2", size="1280x720", rate=30, duration=10, log_file=None
+):
+    log_file = Path(log_file or Path(work_dir, "benchmark.log"))
+    log_file.write_text("", encoding="utf-8")
+    reference, frames = create_reference(flix, work_dir, source, pattern, size, rate, duration)
+    results = []
+    for plugin in plugins.values():
+        if plugin.name not in ladders:
+            logger.warning(f"No benchmark ladder for {plugin.name}, skipping it")
+            continue
+        results.extend(benchmark_plugin(plugin, reference, frames, flix, work_dir, log_file))
+    return dict(
+        created=datetime.now().isoformat(timespec="seconds"),
+        fastflix_version=__version__,
+        ffmpeg_version=flix.ffmpeg_version,
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        reference=dict(source=str(source) if source else pattern, size=size, rate=rate, duration=duration),
+        results=results,
+    )
+
+
+def compare_reports(report, previous, threshold=5):
+    """
+    Add the previous run's numbers to every matching result, with the change in FPS as a percent,
+    and flag anything that slowed down by more than threshold percent as a regression
+    """
+    previous_results = {
+        (result["plugin"], result["setting"], str(result["value"])): result for result in previous.get("results", [])
+    }
+    for result in report["results"]:
+        old = previous_results.get((result["plugin"], result["setting"], str(result["value"])))
+        if not old or not old.get("fps") or not result["fps"]:
+            continue
+        change = (result["fps"] - old["fps"]) / old["fps"] * 100
+        result["previous"] = dict(fps=old["fps"], output_size=old.get("output_size"), wall_time=old["wall_time"])
+        result["fps_change"] = round(change, 2)
+        result["regression"] = change < -threshold
+    report["compared_to"] = dict(created=previous.get("created"), ffmpeg_version=previous.get("ffmpeg_version"))
+    return report
+
+
+def print_report(report):
+    print(f"{'Plugin':<16}{'Setting':<22}{'FPS':>10}{'Wall s':>10}{'CPU s':>10}{'Peak MB':>10}{'Size KB':>10}  Change")
+    for result in report["results"]:
+        change = ""
+        if "fps_change" in result:
+            change = f"{result['fps_change']:+.1f}%{' REGRESSION' if result['regression'] else ''}"
+        print(
+            f"{result['plugin']:<16}"
+            f"{result['setting'] + '=' + str(result['value']):<22}"
+            f"{result['fps'] if result['fps'] is not None else 'failed':>10}"
+            f"{result['wall_time']:>10}"
+            f"{result['cpu_time'] if result['cpu_time'] is not None else '-':>10}"
+            f"{round(result['peak_rss'] / 1024 / 1024, 1) if result['peak_rss'] else '-':>10}"
+            f"{round(result['output_size'] / 1024, 1) if result['output_size'] else '-':>10}"
+            f"  {change}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the speed of every available encoder plugin")
+    parser.add_argument("--source", help="video to take the reference clip from, a lavfi pattern is used otherwise")
+    parser.add_argument("--pattern", default="testsrc2", help="lavfi source pattern, such as testsrc2 or mandelbrot")
+    parser.add_argument("--size", default="1280x720", help="size of the synthetic reference clip")
+    parser.add_argument("--rate", default=30, type=int, help="frame rate of the synthetic reference clip")
+    parser.add_argument("--duration", default=10, type=float, help="length of the reference clip in seconds")
+    parser.add_argument("--plugins", nargs="*", help="only benchmark these plugins, such as 'HEVC (x265)'")
+    parser.add_argument("--output", default="fastflix_benchmark.json", help="where to write the JSON report")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    parser.add_argument("--threshold", default=5, type=float, help="percent of FPS lost that counts as a regression")
+    parser.add_argument("--ffmpeg", default=shutil.which("ffmpeg") or "ffmpeg")
+    parser.add_argument("--ffprobe", default=shutil.which("ffprobe") or "ffprobe")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    data_path = Path(user_data_dir("FastFlix", appauthor=False, roaming=True))
+    flix = Flix(ffmpeg=args.ffmpeg, ffprobe=args.ffprobe, data_path=data_path)
+    plugins = load_plugins(flix.config)
+    if args.plugins:
+        plugins = {name: plugin for name, plugin in plugins.items() if name in args.plugins}
+    if not plugins:
+        logger.error("None of the requested plugins are available with this FFmpeg")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix="fastflix_benchmark_") as work_dir:
+        report = run_benchmark(
+            flix,
+            plugins,
+            work_dir,
+            source=args.source,
+            pattern=args.pattern,
+            size=args.size,
+            rate=args.rate,
+            duration=args.duration,
+            log_file=Path(args.output).with_suffix(".log"),
+        )
+    if args.compare:
+        report = compare_reports(report, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.threshold)
+
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print_report(report)
+    print(f"\nReport saved to {args.output}")
+    if any(result.get("regression") for result in report["results"]):
+        sys.exit(3)
+
+
+if __name__ == "__main__":
+    main()
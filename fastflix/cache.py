@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+import secrets
+from collections import OrderedDict
+from pathlib import Path
+
+from box import Box, BoxError
+
+__all__ = ["DiskCache", "MemoryCache"]
+
+logger = logging.getLogger("fastflix")
+
+
+class DiskCache:
+    """
+    Size bounded least recently used cache, stored as one JSON document per key.
+
+    Every entry is saved with a signature (file size, modification time, tool version, etc.)
+    and is only returned while that signature still matches, otherwise it is treated as a miss.
+    """
+
+    def __init__(self, cache_dir, max_size=50 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_file(self, key):
+        return self.cache_dir / f"{hashlib.sha256(str(key).encode('utf-8')).hexdigest()}.json"
+
+    def _load(self, key):
+        entry_file = self._entry_file(key)
+        try:
+            return Box.from_json(filename=entry_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, BoxError, ValueError):
+            logger.warning(f"Removing unreadable cache entry {entry_file}")
+            self.invalidate(key)
+            return None
+
+    def get(self, key, signature):
+        entry = self._load(key)
+        if not entry or entry.get("signature") != list(signature):
+            return None
+        entry_file = self._entry_file(key)
+        try:
+            # Touching the file keeps the modification time as the "last used" marker for eviction
+            os.utime(entry_file)
+        except OSError:
+            pass
+        return entry.value
+
+    def peek(self, key):
+        """Return the stored value whether or not its signature is still current"""
+        entry = self._load(key)
+        if entry:
+            return entry.value
+
+    def set(self, key, signature, value):
+        entry_file = self._entry_file(key)
+        temp_file = entry_file.with_name(f"{entry_file.stem}.{secrets.token_hex(4)}.tmp")
+        try:
+            Box(key=str(key), signature=list(signature), value=value).to_json(filename=temp_file)
+            os.replace(temp_file, entry_file)
+        except OSError:
+            logger.exception(f"Could not save cache entry for {key}")
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def invalidate(self, key):
+        try:
+            self._entry_file(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self):
+        for entry_file in self.cache_dir.glob("*.json"):
+            try:
+                entry_file.unlink()
+            except OSError:
+                pass
+
+    def evict(self):
+        entries = []
+        for entry_file in self.cache_dir.glob("*.json"):
+            try:
+                stat = entry_file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_file))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_file in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                entry_file.unlink()
+            except OSError:
+                continue
+            total -= size
+
+
+class MemoryCache:
+    """Least recently used in-memory cache, bounded by the combined size of its values"""
+
+    def __init__(self, max_size=64 * 1024 * 1024, size_of=len):
+        self.max_size = max_size
+        self.size_of = size_of
+        self.size = 0
+        self.items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key):
+        if key not in self.items:
+            return None
+        self.items.move_to_end(key)
+        return self.items[key][0]
+
+    def set(self, key, value):
+        if key in self.items:
+            self.size -= self.items.pop(key)[1]
+        size = self.size_of(value)
+        if size > self.max_size:
+            return
+        self.items[key] = (value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, old_size) = self.items.popitem(last=False)
+            self.size -= old_size
+
+    def invalidate(self, key):
+        if key in self.items:
+            self.size -= self.items.pop(key)[1]
+
+    def clear(self):
+        self.items.clear()
+        self.size = 0
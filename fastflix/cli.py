@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Headless batch encoder
+
+Builds the same commands as the GUI straight from each encoder's command builder and runs them on the job queue,
+without importing Qt, so it can be used on machines with no display.
+
+    fastflix-cli "videos/*.mkv" --encoder "HEVC (x265)" --settings x265.json --output-dir encoded
+
+The settings file (JSON or YAML) holds the encoder options the GUI panel would give, such as crf and preset,
+plus any of the general settings like crop, scale, start_time or end_time.
+Every audio and subtitle track is copied unless the settings file lists its own audio_tracks / subtitle_tracks.
+"""
+import argparse
+import glob
+import logging
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+
+from appdirs import user_data_dir
+from box import Box
+
+from fastflix.config import load_config
+from fastflix.encoders import load_plugins
+from fastflix.flix import Flix, FlixError
+from fastflix.job_queue import Job, JobQueue
+from fastflix.version import __version__
+
+logger = logging.getLogger("fastflix-core")
+
+__all__ = ["find_encoder", "build_settings", "build_job", "main"]
+
+
+def find_encoder(name, plugins=None):
+    """Accept either the plugin name shown in the GUI or its package name"""
+    plugins = plugins or load_plugins()
+    for plugin in plugins.values():
+        if name.lower() in (plugin.key, plugin.name.lower()):
+            return plugin
+    raise FlixError(f"Unknown encoder {name}, choose from: {', '.join(plugins)}")
+
+
+def expand_sources(patterns):
+    sources = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            logger.warning(f"Nothing matches {pattern}")
+        sources.extend(Path(match) for match in matches)
+    return sources
+
+
+def default_tracks(streams, audio=True, subtitles=True):
+    """Copy every audio and subtitle track as is, numbered after the video like the GUI does"""
+    audio_tracks, subtitle_tracks = [], []
+    outdex = 1
+    for stream in streams.audio if audio else []:
+        audio_tracks.append(
+            Box(
+                index=stream.index,
+                outdex=outdex,
+                conversion=Box(codec="none", bitrate=""),
+                codec=stream.get("codec_name", ""),
+                downmix=0,
+                title=stream.get("tags", {}).get("title", ""),
+                language=stream.get("tags", {}).get("language"),
+            )
+        )
+        outdex += 1
+    for stream in streams.subtitle if subtitles else []:
+        subtitle_tracks.append(
+            Box(
+                index=stream.index,
+                outdex=outdex,
+                disposition="default" if stream.get("disposition", {}).get("default") else 0,
+                language=stream.get("tags", {}).get("language", ""),
+            )
+        )
+        outdex += 1
+    return audio_tracks, subtitle_tracks
+
+
+def build_settings(flix, source, plugin, settings, output_video, temp_dir):
+    """Combine what the GUI would gather from the probe with the options from the settings file"""
+    streams, format_info, side_data = flix.parse_combined(source, work_dir=temp_dir)
+    if not streams.video:
+        raise FlixError(f"No video track found in {source}")
+    video_track = settings.get("video_track", streams.video[0].index)
+    stream_track = next((number for number, stream in enumerate(streams.video) if stream.index == video_track), 0)
+    audio_tracks, subtitle_tracks = default_tracks(streams, plugin.enable_audio, plugin.enable_subtitles)
+    full = Box(
+        source=str(source),
+        video_track=video_track,
+        stream_track=stream_track,
+        pix_fmt=streams.video[stream_track].get("pix_fmt"),
+        start_time=0,
+        end_time=None,
+        streams=streams,
+        format_info=format_info,
+        side_data=side_data,
+        ffmpeg=flix.ffmpeg,
+        ffprobe=flix.ffprobe,
+        work_dir=temp_dir,
+        temp_dir=temp_dir,
+        output_video=str(output_video),
+        remove_metadata=True,
+        copy_chapters=True,
+        fast_time=True,
+        audio_tracks=audio_tracks,
+        subtitle_tracks=subtitle_tracks,
+    )
+    full.update(settings)
+    if full.get("chunked") or not full.fast_time:
+        full.keyframes = flix.get_keyframes(source, video_track)
+    if full.get("force_scene_keyframes"):
+        full.scene_cuts = flix.get_scene_cuts(source, video_track)
+    return full
+
+
+def build_job(plugin, settings):
+    commands, files = [], {}
+    for command in plugin.build(**settings):
+        files.update(getattr(command, "files", {}))
+        if command.item == "parallel":
+            commands.append([chunk.command for chunk in command.commands])
+        elif command.item == "command":
+            commands.append(command.command)
+        else:
+            raise FlixError(f"{command.item} steps are not supported outside of the GUI")
+    if not commands:
+        raise FlixError(f"{plugin.name} made no commands, the settings file may be missing a crf or bitrate")
+    duration = (settings.end_time or float(settings.format_info.get("duration", 0))) - (settings.start_time or 0)
+    return Job(
+        commands=commands,
+        work_dir=settings.temp_dir,
+        duration=duration,
+        name=Path(settings.source).name,
+        files=files,
+    )
+
+
+def load_settings(settings_file):
+    if not settings_file:
+        return Box()
+    if Path(settings_file).suffix.lower() in (".yaml", ".yml"):
+        return Box.from_yaml(filename=settings_file)
+    return Box.from_json(filename=settings_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"FastFlix {__version__} headless batch encoder")
+    parser.add_argument("sources", nargs="+", help="videos to encode, glob patterns such as 'videos/*.mkv' work")
+    parser.add_argument("-e", "--encoder", required=True, help="plugin name such as 'HEVC (x265)' or hevc_x265")
+    parser.add_argument("-s", "--settings", help="JSON or YAML file of encoder and video settings")
+    parser.add_argument("-o", "--output-dir", help="where to save the encoded videos, next to each source otherwise")
+    parser.add_argument("--overwrite", action="store_true", help="replace outputs that already exist")
+    parser.add_argument("--concurrent-jobs", type=int, help="how many videos to encode at once")
+    parser.add_argument("--dry-run", action="store_true", help="only print the commands that would be run")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the output of the encoder")
+    parser.add_argument("--ffmpeg", default=shutil.which("ffmpeg") or "ffmpeg")
+    parser.add_argument("--ffprobe", default=shutil.which("ffprobe") or "ffprobe")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(asctime)s %(message)s")
+    logging.getLogger("fastflix").setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    try:
+        plugin = find_encoder(args.encoder)
+        settings = load_settings(args.settings)
+    except (FlixError, OSError, ValueError) as err:
+        logger.error(str(err))
+        sys.exit(2)
+
+    data_path = Path(user_data_dir("FastFlix", appauthor=False, roaming=True))
+    config = load_config(data_path)
+    try:
+        flix = Flix(ffmpeg=args.ffmpeg, ffprobe=args.ffprobe, data_path=data_path)
+    except (FlixError, OSError) as err:
+        logger.error(f"Could not run FFmpeg: {err}")
+        sys.exit(2)
+    if plugin.requires and plugin.requires not in flix.config:
+        logger.error(f"{plugin.name} needs an FFmpeg built with {plugin.requires}")
+        sys.exit(2)
+
+    temp_dir = tempfile.TemporaryDirectory(prefix="fastflix_cli_")
+    jobs = []
+    for source in expand_sources(args.sources):
+        output_dir = Path(args.output_dir) if args.output_dir else source.parent
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_video = output_dir / f"{source.stem}-fastflix.{plugin.video_extension}"
+        if output_video.exists() and not args.overwrite:
+            logger.warning(f"Skipping {source}, {output_video} already exists")
+            continue
+        work_dir = Path(temp_dir.name, f"{len(jobs):04d}")
+        work_dir.mkdir()
+        try:
+            job = build_job(plugin, build_settings(flix, source, plugin, settings, output_video, str(work_dir)))
+        except (FlixError, OSError) as err:
+            logger.error(f"Could not prepare {source}: {err}")
+            continue
+        jobs.append(job)
+        if args.dry_run:
+            for step in job.commands:
+                print("\n".join(step) if isinstance(step, list) else step)
+
+    if args.dry_run or not jobs:
+        temp_dir.cleanup()
+        sys.exit(0 if jobs or args.dry_run else 1)
+
+    events = Queue()
+    log_queue = Queue()
+
+    def drain_log():
+        # The runner already logs each line of encoder output at debug, which --verbose shows
+        while True:
+            log_queue.get()
+
+    def progress(report):
+        if report.get("percent") is not None:
+            logger.info(f"{job_names[report['job']]}: {report['percent']}% {report.get('speed') or ''}")
+
+    Thread(target=drain_log, daemon=True).start()
+    job_names = {job.id: job.name for job in jobs}
+    job_queue = JobQueue(
+        log_queue=log_queue,
+        exit_callback=lambda job, process: events.put((job, process)),
+        concurrent_jobs=args.concurrent_jobs or config.get("concurrent_jobs"),
+        chunk_workers=config.get("chunk_workers"),
+        progress_callback=progress,
+    )
+    logger.info(f"Encoding {len(jobs)} video(s) with {plugin.name}, {job_queue.concurrent_jobs} at a time")
+    for job in jobs:
+        job_queue.add(job)
+
+    failed = 0
+    try:
+        while job_queue.active:
+            job = job_queue.command_exited(*events.get())
+            if not job:
+                continue
+            if job.status == "error":
+                failed += 1
+                logger.error(f"Error during conversion of {job.name}")
+            else:
+                logger.info(f"{job.name} conversion complete")
+    except KeyboardInterrupt:
+        logger.warning("Cancelling all encodes")
+        job_queue.cancel()
+        sys.exit(130)
+    finally:
+        temp_dir.cleanup()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
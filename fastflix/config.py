@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from json import JSONDecodeError
+from pathlib import Path
+
+from box import Box, BoxError
+
+__all__ = ["load_config", "file_date"]
+
+
+def load_config(data_path):
+    """Read the config file for the core process, which only needs a few optional settings"""
+    try:
+        return Box.from_json(filename=Path(data_path, "fastflix.json"))
+    except (OSError, JSONDecodeError, BoxError):
+        return Box()
+
+
+def file_date():
+    return datetime.now().isoformat().replace(":", ".").rsplit(".", 1)[0]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import importlib
+import logging
+from pathlib import Path
+
+__all__ = ["Plugin", "load_plugins", "builtin_plugins", "entry_point_group"]
+
+logger = logging.getLogger("fastflix")
+
+# Third party encoders register here, pointing at a dict of the same metadata as builtin_plugins
+# (or at their main module, which is then imported straight away)
+entry_point_group = "fastflix.encoders"
+
+icon_dir = Path(__file__).parent.parent / "data" / "encoders"
+
+
+def _builtin(package, name, requires, video_extension, icon, **enabled):
+    return dict(
+        name=name,
+        requires=requires,
+        video_extension=video_extension,
+        icon=str(icon_dir / icon),
+        module=f"fastflix.encoders.{package}.main",
+        builder=f"fastflix.encoders.{package}.command_builder",
+        **enabled,
+    )
+
+
+builtin_plugins = [
+    _builtin("hevc_x265", "HEVC (x265)", "libx265", "mkv", "icon_x265.png"),
+    _builtin("avc_x264", "AVC (x264)", "libx264", "mkv", "icon_x264.png"),
+    _builtin(
+        "gif",
+        "GIF",
+        None,
+        "gif",
+        "icon_gif.png",
+        enable_audio=False,
+        enable_subtitles=False,
+        enable_attachments=False,
+    ),
+    _builtin("vp9", "VP9", "libvpx", "webm", "icon_vp9.png", enable_subtitles=False, enable_attachments=False),
+    _builtin("av1_aom", "AV1 (AOM)", "libaom", "mkv", "icon_av1_aom.png"),
+    _builtin("rav1e", "AV1 (rav1e)", "librav1e", "mkv", "icon_rav1e.png"),
+    _builtin("svt_av1", "AV1 (SVT AV1)", "libsvtav1", "mkv", "icon_svt_av1.png"),
+]
+
+
+class Plugin:
+    """
+    An encoder plugin known only by its metadata until something else is needed from it.
+    Asking for any other attribute, like settings_panel or audio_formats, imports the plugin's main module,
+    while build only imports its command builder, which does not need Qt.
+    """
+
+    def __init__(
+        self,
+        name,
+        module,
+        builder=None,
+        requires=None,
+        video_extension="mkv",
+        icon=None,
+        enable_audio=True,
+        enable_subtitles=True,
+        enable_attachments=True,
+        loaded=None,
+    ):
+        self._module = loaded
+        self._builder = None
+        self.name = name
+        self.module = module
+        self.builder = builder
+        self.requires = requires
+        self.video_extension = video_extension
+        self.icon = icon
+        self.enable_audio = enable_audio
+        self.enable_subtitles = enable_subtitles
+        self.enable_attachments = enable_attachments
+
+    @property
+    def key(self):
+        """Short name of a builtin plugin, the name of its package"""
+        parts = self.module.split(".")
+        return parts[-2] if len(parts) > 1 and parts[-1] == "main" else parts[-1]
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            logger.debug(f"Loading encoder plugin {self.name}")
+            self._module = importlib.import_module(self.module)
+        return self._module
+
+    def build(self, **settings):
+        if self._builder is None:
+            self._builder = importlib.import_module(self.builder) if self.builder else self.load()
+        return self._builder.build(**settings)
+
+    def __getattr__(self, item):
+        # Only reached for attributes that are not metadata
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.load(), item)
+
+    def __repr__(self):
+        return f"<Plugin {self.name} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def _entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        try:
+            from importlib_metadata import entry_points
+        except ImportError:
+            return []
+    found = entry_points()
+    if hasattr(found, "select"):
+        return list(found.select(group=entry_point_group))
+    return list(found.get(entry_point_group, []))
+
+
+def entry_point_plugins():
+    plugins = []
+    for entry_point in _entry_points():
+        try:
+            target = entry_point.load()
+        except Exception:
+            logger.exception(f"Could not load encoder plugin {entry_point.name}")
+            continue
+        if isinstance(target, dict):
+            plugins.append(Plugin(**target))
+        else:
+            plugins.append(
+                Plugin(
+                    name=target.name,
+                    module=target.__name__,
+                    requires=getattr(target, "requires", None),
+                    video_extension=getattr(target, "video_extension", "mkv"),
+                    icon=getattr(target, "icon", None),
+                    enable_audio=getattr(target, "enable_audio", True),
+                    enable_subtitles=getattr(target, "enable_subtitles", True),
+                    enable_attachments=getattr(target, "enable_attachments", True),
+                    loaded=target,
+                )
+            )
+    return plugins
+
+
+def load_plugins(configuration=None):
+    """
+    Every encoder plugin the FFmpeg build supports, by name, without importing any of them.
+    Without an FFmpeg configuration all plugins are returned.
+    """
+    plugins = {}
+    for plugin in [Plugin(**metadata) for metadata in builtin_plugins] + entry_point_plugins():
+        if plugin.name in plugins:
+            logger.warning(f"Ignoring encoder plugin {plugin.module}, {plugin.name} is already provided")
+            continue
+        if configuration is None or not plugin.requires or plugin.requires in configuration:
+            plugins[plugin.name] = plugin
+    return plugins
@@ -4,7 +4,14 @@ import secrets
 from pathlib import Path
 
 from fastflix.encoders.common.audio import build_audio
-from fastflix.encoders.common.helpers import Command, generate_ending, generate_ffmpeg_start, generate_filters, null
+from fastflix.encoders.common.helpers import (
+    Command,
+    generate_chunked,
+    generate_ending,
+    generate_ffmpeg_start,
+    generate_filters,
+    null,
+)
 from fastflix.encoders.common.subtitles import build_subtitle
 
 
@@ -27,23 +34,14 @@ def build(
     attachments="",
     pix_fmt="yuv420p10le",
     usage="good",
+    chunked=False,
     **kwargs,
 ):
     filters = generate_filters(**kwargs)
     audio = build_audio(audio_tracks)
     subtitles = build_subtitle(subtitle_tracks)
     ending = generate_ending(audio=audio, subtitles=subtitles, cover=attachments, output_video=output_video, **kwargs)
-    beginning = generate_ffmpeg_start(
-        source=source,
-        ffmpeg=ffmpeg,
-        encoder="libaom-av1",
-        video_track=video_track,
-        filters=filters,
-        pix_fmt=pix_fmt,
-        **kwargs,
-    )
-
-    beginning += (
+    encoder_options = (
         "-strict experimental "
         f"-cpu-used {cpu_used} "
         f"-tile-rows {tile_rows} "
@@ -52,14 +50,43 @@ def build(
     )
 
     if row_mt is not None:
-        beginning += f"-row-mt {row_mt} "
+        encoder_options += f"-row-mt {row_mt} "
 
     if not disable_hdr and pix_fmt == "yuv420p10le":
 
         if side_data and side_data.get("color_primaries") == "bt2020":
-            beginning += "-color_primaries bt2020 -color_trc smpte2084 -colorspace bt2020nc"
+            encoder_options += "-color_primaries bt2020 -color_trc smpte2084 -colorspace bt2020nc"
+
+    def start(**times):
+        beginning = generate_ffmpeg_start(
+            source=source,
+            ffmpeg=ffmpeg,
+            encoder="libaom-av1",
+            video_track=video_track,
+            filters=filters,
+            pix_fmt=pix_fmt,
+            **{**kwargs, **times},
+        )
+        return re.sub("[ ]+", " ", f"{beginning} {encoder_options}")
+
+    beginning = start()
 
-    beginning = re.sub("[ ]+", " ", beginning)
+    if chunked and crf and not bitrate:
+        commands = generate_chunked(
+            lambda chunk_start, chunk_end: start(start_time=chunk_start, end_time=chunk_end, fast_time=True)
+            + f" -b:v 0 -crf {crf}",
+            ffmpeg=ffmpeg,
+            source=source,
+            temp_dir=temp_dir,
+            output_video=output_video,
+            audio_tracks=audio_tracks,
+            subtitle_tracks=subtitle_tracks,
+            attachments=attachments,
+            name="CRF",
+            **kwargs,
+        )
+        if commands:
+            return commands
 
     if bitrate:
         pass_log_file = Path(temp_dir) / f"pass_log_file_{secrets.token_hex(10)}.log"
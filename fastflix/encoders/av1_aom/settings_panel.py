@@ -51,6 +51,7 @@ class AV1(SettingPanel):
         grid.addLayout(self.init_pix_fmt(), 7, 0, 1, 2)
 
         grid.addLayout(self.init_modes(), 0, 2, 5, 4)
+        grid.addLayout(self._add_chunked(), 5, 2, 1, 2)
 
         grid.addLayout(self._add_custom(), 10, 0, 1, 6)
         grid.setRowStretch(8, 1)
@@ -198,6 +199,7 @@ class AV1(SettingPanel):
             max_mux=self.widgets.max_mux.currentText(),
             pix_fmt=self.widgets.pix_fmt.currentText().split(":")[1].strip(),
             extra=self.ffmpeg_extras,
+            chunked=self.widgets.chunked.isChecked(),
         )
 
         if self.mode == "CRF":
@@ -1,6 +1,13 @@
 # -*- coding: utf-8 -*-
+import secrets
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
 import reusables
 
+from fastflix.encoders.common.audio import build_audio
+from fastflix.encoders.common.subtitles import build_subtitle
+
 null = "/dev/null"
 if reusables.win_based:
     null = "NUL"
@@ -21,13 +28,31 @@ class Loop:
 class Command:
     item = "command"
 
-    def __init__(self, command, variables, internal, name="", ensure_paths=(), exe=None):
+    def __init__(self, command, variables, internal, name="", ensure_paths=(), exe=None, files=None):
         self.name = name
         self.command = command
         self.variables = variables
         self.internal = internal
         self.ensure_paths = ensure_paths
         self.exe = exe
+        # Small text files {path: content} the command reads, written by whatever runs it just before it starts
+        self.files = files or {}
+
+
+class Parallel:
+    item = "parallel"
+
+    def __init__(self, commands, name=""):
+        self.name = name
+        self.commands = commands
+
+
+def previous_keyframe(keyframes, seconds):
+    """Time of the last keyframe at or before seconds, or 0 if there is none"""
+    if not keyframes:
+        return 0
+    index = bisect_right(keyframes, seconds)
+    return keyframes[index - 1] if index else 0
 
 
 def generate_ffmpeg_start(
@@ -41,14 +66,34 @@ def generate_ffmpeg_start(
     filters=None,
     max_mux="default",
     fast_time=True,
+    keyframes=None,
+    scene_cuts=None,
+    force_scene_keyframes=False,
     **_,
 ):
     time_settings = f'{f"-ss {start_time}" if start_time else ""} {f"-to {end_time}" if end_time else ""} '
     time_one = time_settings if fast_time else ""
     time_two = time_settings if not fast_time else ""
+    if not fast_time and start_time and keyframes:
+        # Jump straight to the keyframe before the start, then only decode the frames between it and the start
+        keyframe = previous_keyframe(keyframes, start_time)
+        if keyframe:
+            time_one = f"-ss {keyframe}"
+            time_two = (
+                f"-ss {round(start_time - keyframe, 6)} "
+                f'{f"-to {round(end_time - keyframe, 6)}" if end_time else ""}'
+            )
+
+    force_key_frames = ""
+    if force_scene_keyframes and scene_cuts:
+        # Forced keyframe times are output timestamps, which start at zero after trimming
+        start = start_time or 0
+        times = [round(cut - start, 6) for cut in scene_cuts if start < cut and (not end_time or cut < end_time)]
+        if times:
+            force_key_frames = f'-force_key_frames "{",".join(str(time) for time in times)}"'
 
     return (
-        f'"{ffmpeg}" -y '
+        f'"{ffmpeg}" -y -progress pipe:1 '
         f" {time_one} "
         f'-i "{source}" '
         f" {time_two} "
@@ -56,6 +101,7 @@ def generate_ffmpeg_start(
         f"-map 0:{video_track} "
         f"-c:v:0 {encoder} "
         f"-pix_fmt {pix_fmt} "
+        f"{force_key_frames} "
         f'{f"-vf {filters}" if filters else ""} '
     )
 
@@ -69,11 +115,12 @@ def generate_ending(
     remove_metadata=True,
     null_ending=False,
     extra="",
+    chapters_file_index=0,
     **_,
 ):
     ending = (
         f" {'-map_metadata -1' if remove_metadata else ''} "
-        f"{'-map_chapters 0' if copy_chapters else ''} "
+        f"{f'-map_chapters {chapters_file_index}' if copy_chapters else ''} "
         f"{audio} {subtitles} {cover} {extra} "
     )
     if output_video and not null_ending:
@@ -83,6 +130,103 @@ def generate_ending(
     return ending
 
 
+def chunk_times(start_time, end_time, keyframes, chunk_length=30, scene_cuts=None):
+    """
+    Split the trimmed range into pieces of at least chunk_length seconds that each start on a keyframe,
+    so they can be encoded on their own and joined back together without re-encoding.
+    Keyframes that sit on a scene cut are preferred as long as the piece stays under twice chunk_length.
+    """
+    keyframes = [keyframe for keyframe in keyframes if keyframe <= end_time - chunk_length / 2]
+    cut_keyframes = set()
+    for cut in scene_cuts or ():
+        keyframe = previous_keyframe(keyframes, cut)
+        if cut - keyframe < 1:
+            cut_keyframes.add(keyframe)
+
+    points = [start_time or 0]
+    while True:
+        index = bisect_left(keyframes, points[-1] + chunk_length)
+        if index >= len(keyframes):
+            break
+        window = keyframes[index : bisect_left(keyframes, points[-1] + chunk_length * 2, index)]
+        points.append(next((keyframe for keyframe in window if keyframe in cut_keyframes), keyframes[index]))
+    return list(zip(points, points[1:] + [end_time]))
+
+
+def generate_chunked(
+    chunk_command,
+    ffmpeg,
+    source,
+    temp_dir,
+    output_video,
+    keyframes=None,
+    scene_cuts=None,
+    audio_tracks=(),
+    subtitle_tracks=(),
+    attachments="",
+    start_time=0,
+    end_time=None,
+    format_info=None,
+    chunk_length=30,
+    extra="",
+    name="",
+    **kwargs,
+):
+    """
+    Encode the video in independent chunks split at keyframes, then join them losslessly with the concat demuxer
+    while muxing in the audio, subtitles, attachments and chapters from the source.
+
+    chunk_command(start_time, end_time) has to return the video only encode command for one chunk, without output.
+    """
+    end_time = end_time or float((format_info or {}).get("duration", 0))
+    if not keyframes or not end_time:
+        return None
+    token = secrets.token_hex(6)
+    chunks, concat_list = [], []
+    for index, (chunk_start, chunk_end) in enumerate(
+        chunk_times(start_time, end_time, keyframes, chunk_length, scene_cuts)
+    ):
+        chunk_file = Path(temp_dir) / f"chunk_{token}_{index:04d}.mkv"
+        chunks.append(
+            Command(
+                f'{chunk_command(chunk_start, chunk_end)} {extra} -an -sn -dn -map_metadata -1 "{chunk_file}"',
+                ["ffmpeg", "output"],
+                False,
+                name=f"Chunk {index + 1}",
+                exe="ffmpeg",
+            )
+        )
+        escaped = chunk_file.as_posix().replace("'", "'\\''")
+        concat_list.append(f"file '{escaped}'")
+
+    # Written by the job queue when the join starts, as a command line holding every chunk gets too long on Windows
+    concat_file = Path(temp_dir) / f"concat_{token}.txt"
+    time_settings = f'{f"-ss {start_time}" if start_time else ""} -to {end_time}'
+    ending = generate_ending(
+        audio=build_audio(audio_tracks, audio_file_index=1),
+        subtitles=build_subtitle(subtitle_tracks, subtitle_file_index=1),
+        cover=attachments,
+        output_video=output_video,
+        chapters_file_index=1,
+        **kwargs,
+    )
+    join = (
+        f'"{ffmpeg}" -y -progress pipe:1 -f concat -safe 0 '
+        f'-i "{concat_file}" {time_settings} -i "{source}" -map 0:v -c:v copy {ending}'
+    )
+    return [
+        Parallel(chunks, name=f"{name} in {len(chunks)} chunks".strip()),
+        Command(
+            join,
+            ["ffmpeg", "output"],
+            False,
+            name="Join chunks",
+            exe="ffmpeg",
+            files={str(concat_file): "\n".join(concat_list) + "\n"},
+        ),
+    ]
+
+
 def generate_filters(**kwargs):
     crop = kwargs.get("crop")
     scale = kwargs.get("scale")
@@ -91,6 +91,19 @@ class SettingPanel(QtWidgets.QWidget):
             connect=connect,
         )
 
+    def _add_chunked(self, connect="default"):
+        return self._add_check_box(
+            label="Chunked encode",
+            widget_name="chunked",
+            checked=False,
+            tooltip=(
+                "Split the video at keyframes and encode the pieces side by side,\n"
+                "for machines with more cores than one encoder can use.\n"
+                "Only used with CRF / QP and once the keyframes of the source are known"
+            ),
+            connect=connect,
+        )
+
     @property
     def ffmpeg_extras(self):
         return self.ffmpeg_extras_widget.text().strip()
@@ -23,7 +23,7 @@ def build(
     filters = generate_filters(**kwargs)
 
     beginning = (
-        f'"{ffmpeg}" -y '
+        f'"{ffmpeg}" -y -progress pipe:1 '
         f'{f"-ss {start_time}" if start_time else ""} '
         f'{f"-to {end_time}" if end_time else ""} '
         f'-i "{source}" '
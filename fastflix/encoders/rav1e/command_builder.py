@@ -9,7 +9,14 @@ from pathlib import Path
 import reusables
 
 from fastflix.encoders.common.audio import build_audio
-from fastflix.encoders.common.helpers import Command, generate_ending, generate_ffmpeg_start, generate_filters, null
+from fastflix.encoders.common.helpers import (
+    Command,
+    generate_chunked,
+    generate_ending,
+    generate_ffmpeg_start,
+    generate_filters,
+    null,
+)
 from fastflix.encoders.common.subtitles import build_subtitle
 
 logger = logging.getLogger("fastflix")
@@ -42,6 +49,7 @@ def build(
     side_data=None,
     single_pass=False,
     attachments="",
+    chunked=False,
     **kwargs,
 ):
     filters = generate_filters(disable_hdr=disable_hdr, **kwargs)
@@ -49,17 +57,7 @@ def build(
     subtitles = build_subtitle(subtitle_tracks)
     ending = generate_ending(audio=audio, subtitles=subtitles, cover=attachments, output_video=output_video, **kwargs)
 
-    beginning = generate_ffmpeg_start(
-        source=source,
-        ffmpeg=ffmpeg,
-        encoder="librav1e",
-        video_track=video_track,
-        filters=filters,
-        pix_fmt=pix_fmt,
-        **kwargs,
-    )
-
-    beginning += (
+    encoder_options = (
         "-strict experimental "
         f"-speed {speed} "
         f"-tile-columns {tile_columns} "
@@ -67,14 +65,10 @@ def build(
         f"-tiles {tiles} "
     )
 
-    if not single_pass:
-        pass_log_file = Path(temp_dir) / f"pass_log_file_{secrets.token_hex(10)}.log"
-        beginning += f'-passlogfile "{pass_log_file}" '
-
     if not disable_hdr and pix_fmt == "yuv420p10le":
 
         if side_data and side_data.get("color_primaries") == "bt2020":
-            beginning += "-color_primaries bt2020 -color_trc smpte2084 -colorspace bt2020nc"
+            encoder_options += "-color_primaries bt2020 -color_trc smpte2084 -colorspace bt2020nc "
 
         # Currently unsupported https://github.com/xiph/rav1e/issues/2554
         #         rav1e_options = []
@@ -94,7 +88,39 @@ def build(
         #     opts = ":".join(rav1e_options)
         #     beginning += f'-rav1e-params "{opts}"'
 
-    beginning = re.sub("[ ]+", " ", beginning)
+    def start(**times):
+        beginning = generate_ffmpeg_start(
+            source=source,
+            ffmpeg=ffmpeg,
+            encoder="librav1e",
+            video_track=video_track,
+            filters=filters,
+            pix_fmt=pix_fmt,
+            **{**kwargs, **times},
+        )
+        return re.sub("[ ]+", " ", f"{beginning} {encoder_options}")
+
+    if chunked and not bitrate:
+        commands = generate_chunked(
+            lambda chunk_start, chunk_end: start(start_time=chunk_start, end_time=chunk_end, fast_time=True)
+            + f" -qp {qp}",
+            ffmpeg=ffmpeg,
+            source=source,
+            temp_dir=temp_dir,
+            output_video=output_video,
+            audio_tracks=audio_tracks,
+            subtitle_tracks=subtitle_tracks,
+            attachments=attachments,
+            name="QP",
+            **kwargs,
+        )
+        if commands:
+            return commands
+
+    beginning = start()
+    if not single_pass:
+        pass_log_file = Path(temp_dir) / f"pass_log_file_{secrets.token_hex(10)}.log"
+        beginning += f'-passlogfile "{pass_log_file}" '
 
     pass_type = "bitrate" if bitrate else "QP"
 
@@ -62,6 +62,7 @@ class RAV1E(SettingPanel):
 
         grid.addLayout(self.init_modes(), 0, 2, 4, 4)
         grid.addLayout(self.init_single_pass(), 4, 2, 1, 1)
+        grid.addLayout(self._add_chunked(), 5, 2, 1, 2)
         grid.addLayout(self._add_custom(), 10, 0, 1, 6)
 
         grid.setRowStretch(9, 1)
@@ -200,6 +201,7 @@ class RAV1E(SettingPanel):
             tile_rows=int(self.widgets.tile_rows.currentText()),
             tiles=int(self.widgets.tiles.currentText()),
             single_pass=self.widgets.single_pass.isChecked(),
+            chunked=self.widgets.chunked.isChecked(),
             max_mux=self.widgets.max_mux.currentText(),
             extra=self.ffmpeg_extras,
             pix_fmt=self.widgets.pix_fmt.currentText().split(":")[1].strip(),
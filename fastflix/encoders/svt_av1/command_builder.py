@@ -9,7 +9,14 @@ from pathlib import Path
 import reusables
 
 from fastflix.encoders.common.audio import build_audio
-from fastflix.encoders.common.helpers import Command, generate_ending, generate_ffmpeg_start, generate_filters, null
+from fastflix.encoders.common.helpers import (
+    Command,
+    generate_chunked,
+    generate_ending,
+    generate_ffmpeg_start,
+    generate_filters,
+    null,
+)
 from fastflix.encoders.common.subtitles import build_subtitle
 
 logger = logging.getLogger("fastflix")
@@ -43,6 +50,7 @@ def build(
     side_data=None,
     single_pass=False,
     attachments="",
+    chunked=False,
     **kwargs,
 ):
     filters = generate_filters(disable_hdr=disable_hdr, **kwargs)
@@ -50,17 +58,7 @@ def build(
     subtitles = build_subtitle(subtitle_tracks)
     ending = generate_ending(audio=audio, subtitles=subtitles, cover=attachments, output_video=output_video, **kwargs)
 
-    beginning = generate_ffmpeg_start(
-        source=source,
-        ffmpeg=ffmpeg,
-        encoder="libsvtav1",
-        video_track=video_track,
-        filters=filters,
-        pix_fmt=pix_fmt,
-        **kwargs,
-    )
-
-    beginning += (
+    encoder_options = (
         f"-strict experimental "
         f"-preset {speed} "
         f"-tile_columns {tile_columns} "
@@ -69,16 +67,44 @@ def build(
         f"-sc_detection {sc_detection} "
     )
 
-    if not single_pass:
-        pass_log_file = Path(temp_dir) / f"pass_log_file_{secrets.token_hex(10)}.log"
-        beginning += f'-passlogfile "{pass_log_file}" '
-
     if not disable_hdr and pix_fmt == "yuv420p10le":
 
         if side_data and side_data.get("color_primaries") == "bt2020":
-            beginning += "-color_primaries bt2020 -color_trc smpte2084 -colorspace bt2020nc"
-
-    beginning = re.sub("[ ]+", " ", beginning)
+            encoder_options += "-color_primaries bt2020 -color_trc smpte2084 -colorspace bt2020nc "
+
+    def start(**times):
+        beginning = generate_ffmpeg_start(
+            source=source,
+            ffmpeg=ffmpeg,
+            encoder="libsvtav1",
+            video_track=video_track,
+            filters=filters,
+            pix_fmt=pix_fmt,
+            **{**kwargs, **times},
+        )
+        return re.sub("[ ]+", " ", f"{beginning} {encoder_options}")
+
+    if chunked and qp is not None and not bitrate:
+        commands = generate_chunked(
+            lambda chunk_start, chunk_end: start(start_time=chunk_start, end_time=chunk_end, fast_time=True)
+            + f" -qp {qp} -rc 0",
+            ffmpeg=ffmpeg,
+            source=source,
+            temp_dir=temp_dir,
+            output_video=output_video,
+            audio_tracks=audio_tracks,
+            subtitle_tracks=subtitle_tracks,
+            attachments=attachments,
+            name="QP",
+            **kwargs,
+        )
+        if commands:
+            return commands
+
+    beginning = start()
+    if not single_pass:
+        pass_log_file = Path(temp_dir) / f"pass_log_file_{secrets.token_hex(10)}.log"
+        beginning += f'-passlogfile "{pass_log_file}" '
 
     pass_type = "bitrate" if bitrate else "QP"
 
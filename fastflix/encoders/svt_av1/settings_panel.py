@@ -66,6 +66,7 @@ class SVT_AV1(SettingPanel):
 
         grid.addLayout(self.init_modes(), 0, 2, 4, 4)
         grid.addLayout(self.init_single_pass(), 4, 2, 1, 1)
+        grid.addLayout(self._add_chunked(), 5, 2, 1, 2)
         grid.setRowStretch(8, 1)
         guide_label = QtWidgets.QLabel(
             f"<a href='https://github.com/AOMediaCodec/SVT-AV1/blob/master/Docs/svt-av1_encoder_user_guide.md'>SVT-AV1 Encoding Guide</a>"
@@ -207,6 +208,7 @@ class SVT_AV1(SettingPanel):
             tile_columns=int(self.widgets.tile_columns.currentText()),
             tile_rows=int(self.widgets.tile_rows.currentText()),
             single_pass=self.widgets.single_pass.isChecked(),
+            chunked=self.widgets.chunked.isChecked(),
             tier=int(self.widgets.tier.currentIndex()),
             sc_detection=int(self.widgets.sc_detection.currentIndex()),
             pix_fmt=self.widgets.pix_fmt.currentText().split(":")[1].strip(),
@@ -1,12 +1,23 @@
 # -*- coding: utf-8 -*-
+import base64
 import logging
 import os
+import shlex
+import shutil
+import time
+from multiprocessing import TimeoutError
 from multiprocessing.pool import ThreadPool
-from subprocess import PIPE, STDOUT, Popen, run
+from pathlib import Path
+from subprocess import PIPE, STDOUT, CompletedProcess, Popen, run
+from threading import Lock
 
+import reusables
 from box import Box, BoxError
 
-__all__ = ["FlixError", "ff_version", "Flix", "guess_bit_depth"]
+from fastflix.cache import DiskCache
+from fastflix.encoders.common.helpers import previous_keyframe
+
+__all__ = ["FlixError", "ff_version", "Flix", "guess_bit_depth", "low_priority_options"]
 
 here = os.path.abspath(os.path.dirname(__file__))
 
@@ -77,15 +88,347 @@ def guess_bit_depth(pix_fmt, color_primaries):
         return 8
 
 
+def low_priority_options():
+    """Popen keyword arguments that keep background FFmpeg runs from competing with the interface or encodes"""
+    if reusables.win_based:
+        # BELOW_NORMAL_PRIORITY_CLASS
+        return {"creationflags": 0x00004000}
+    return {"preexec_fn": lambda: os.nice(10)}
+
+
 class Flix:
-    def __init__(self, ffmpeg="ffmpeg", ffprobe="ffprobe"):
+    def __init__(self, ffmpeg="ffmpeg", ffprobe="ffprobe", data_path=None, probe_cache_size=50 * 1024 * 1024):
         self.ffmpeg = ffmpeg
         self.ffprobe = ffprobe
         self.tp = ThreadPool(processes=4)
-        self.config, self.filters, self.ffmpeg_version = self.ffmpeg_configuration()
-        self.ffprobe_version = ff_version(ffprobe, True)
+        # Scans that read a whole source get their own threads, so they never hold up quick probes and previews
+        self.scan_pool = ThreadPool(processes=2)
+        self.scans = {}
+        self.scan_lock = Lock()
+        self.scan_source = None
+        self.probe_cache = None
+        self.capability_cache = None
+        self.filmstrip_cache = None
+        self.keyframe_cache = None
+        self.scene_cache = None
+        if data_path:
+            self.probe_cache = DiskCache(Path(data_path, "cache", "probe"), max_size=probe_cache_size)
+            self.capability_cache = DiskCache(Path(data_path, "cache", "capabilities"), max_size=1024 * 1024)
+            self.filmstrip_cache = DiskCache(Path(data_path, "cache", "filmstrip"), max_size=probe_cache_size)
+            self.keyframe_cache = DiskCache(Path(data_path, "cache", "keyframes"), max_size=probe_cache_size)
+            self.scene_cache = DiskCache(Path(data_path, "cache", "scenes"), max_size=probe_cache_size)
+        self._set_capabilities(self.load_capabilities())
+
+    def _set_capabilities(self, capabilities):
+        self.config = capabilities.config
+        self.filters = capabilities.filters
+        self.ffmpeg_version = capabilities.ffmpeg_version
+        self.ffprobe_version = capabilities.ffprobe_version
+        self.audio_encoders = capabilities.audio_encoders
+
+    @staticmethod
+    def _resolve_binary(binary):
+        return Path(shutil.which(str(binary)) or binary).resolve()
+
+    def _binary_signature(self):
+        signature = []
+        for binary in (self.ffmpeg, self.ffprobe):
+            stat = self._resolve_binary(binary).stat()
+            signature.extend([stat.st_size, stat.st_mtime_ns])
+        return signature
+
+    def load_capabilities(self):
+        """
+        Use the stored FFmpeg / FFprobe capabilities when the binaries are unchanged since they were discovered.
+        If they have changed, the previous results are used for this launch while fresh ones are gathered in the
+        background for the next.
+        """
+        if not self.capability_cache:
+            return self.discover_capabilities()
+        key = f"{self._resolve_binary(self.ffmpeg)}|{self._resolve_binary(self.ffprobe)}"
+        try:
+            signature = self._binary_signature()
+        except OSError:
+            return self.discover_capabilities()
+
+        capabilities = self.capability_cache.get(key, signature)
+        if capabilities:
+            logger.debug("Using cached FFmpeg capabilities")
+            return capabilities
+
+        capabilities = self.capability_cache.peek(key)
+        if capabilities:
+            logger.info("FFmpeg has changed since last launch, refreshing capabilities in the background")
+            self.tp.apply_async(self._refresh_capabilities, (key, signature))
+            return capabilities
+
+        capabilities = self.discover_capabilities()
+        self.capability_cache.set(key, signature, capabilities)
+        return capabilities
+
+    def _refresh_capabilities(self, key, signature):
+        try:
+            capabilities = self.discover_capabilities()
+        except Exception:
+            logger.exception("Could not refresh FFmpeg capabilities")
+            return
+        self.capability_cache.set(key, signature, capabilities)
+        self._set_capabilities(capabilities)
+
+    def discover_capabilities(self, timeout=60):
+        """
+        Run the FFmpeg and FFprobe discovery commands concurrently on the thread pool,
+        so a cold start only takes as long as the slowest of them.
+        """
+        jobs = {
+            "ffmpeg version": self.tp.apply_async(self._ffmpeg_version_config),
+            "ffmpeg filters": self.tp.apply_async(self._ffmpeg_filters),
+            "ffmpeg encoders": self.tp.apply_async(self._audio_encoders),
+            "ffprobe version": self.tp.apply_async(ff_version, (self.ffprobe, True)),
+        }
+        deadline = time.monotonic() + timeout
+        results = {}
+        for name, job in jobs.items():
+            try:
+                results[name] = job.get(timeout=max(0, deadline - time.monotonic()))
+            except TimeoutError:
+                raise FlixError(f"Timed out after {timeout} seconds waiting for {name}")
+
+        config, ffmpeg_version = results["ffmpeg version"]
+        return Box(
+            config=config,
+            filters=results["ffmpeg filters"],
+            ffmpeg_version=ffmpeg_version,
+            ffprobe_version=results["ffprobe version"],
+            audio_encoders=results["ffmpeg encoders"],
+        )
+
+    def _probe_signature(self, file):
+        stat = os.stat(file)
+        return [stat.st_size, stat.st_mtime_ns, self.ffprobe_version]
+
+    def _cached_probe(self, file, section, func):
+        """Return the section of the cached probe results for the file, running func on a miss"""
+        if not self.probe_cache:
+            return func()
+        key = str(Path(file).resolve())
+        try:
+            signature = self._probe_signature(file)
+        except OSError:
+            return func()
+        entry = self.probe_cache.get(key, signature) or Box()
+        if section in entry:
+            logger.debug(f"Using cached {section} data for {key}")
+            return entry[section]
+        entry[section] = func()
+        self.probe_cache.set(key, signature, entry)
+        return entry[section]
+
+    def invalidate_probe_cache(self, file):
+        if self.probe_cache:
+            self.probe_cache.invalidate(str(Path(file).resolve()))
+
+    def clear_probe_cache(self):
+        if self.probe_cache:
+            self.probe_cache.clear()
+        if self.filmstrip_cache:
+            self.filmstrip_cache.clear()
+        if self.keyframe_cache:
+            self.keyframe_cache.clear()
+        if self.scene_cache:
+            self.scene_cache.clear()
+
+    def scan(self, command, file):
+        """
+        Run a command that reads the whole file at low priority. It is killed by cancel_scans once another
+        source is opened, and does not start at all if that already happened while it was waiting.
+        """
+        file = str(file)
+        with self.scan_lock:
+            if self.scan_source is not None and file != self.scan_source:
+                raise FlixError(f"Scan of {file} cancelled, it is no longer open")
+            logger.debug(f"running scan: {command}")
+            process = Popen(shlex.split(command), stdin=PIPE, stdout=PIPE, stderr=PIPE, **low_priority_options())
+            self.scans[process] = file
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            with self.scan_lock:
+                self.scans.pop(process, None)
+        if getattr(process, "cancelled", False):
+            raise FlixError(f"Scan of {file} cancelled, it is no longer open")
+        return CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def cancel_scans(self, keep=None):
+        """Kill the scans of every file but keep, and do not start any of theirs that are still waiting"""
+        with self.scan_lock:
+            self.scan_source = str(keep) if keep else ""
+            for process, file in self.scans.items():
+                if file != self.scan_source and process.poll() is None:
+                    process.cancelled = True
+                    try:
+                        process.kill()
+                    except OSError:
+                        pass
+
+    def source_start(self, file):
+        """
+        The start time of the container, which packet timestamps of formats such as MPEG-TS begin at.
+        Input seeking with -ss counts from it instead, as does the timeline of the GUI.
+        """
+        try:
+            return float(self.probe(file).get("format", {}).get("start_time") or 0)
+        except (FlixError, ValueError):
+            return 0.0
+
+    def get_keyframes(self, file, video_track, background=False):
+        """
+        Sorted timestamps of every keyframe in the video track, counted from the start of the file like -ss does,
+        read once from the packet flags and then cached. In the background the read is a cancellable, low priority scan.
+        """
+        key = f"{Path(file).resolve()}|{video_track}|from_start"
+        try:
+            signature = self._probe_signature(file)
+        except OSError:
+            signature = None
+        if self.keyframe_cache and signature:
+            keyframes = self.keyframe_cache.get(key, signature)
+            if keyframes is not None:
+                logger.debug(f"Using cached keyframe index for {key}")
+                return tuple(keyframes)
+        keyframes = self._keyframes(file, video_track, background)
+        if self.keyframe_cache and signature:
+            self.keyframe_cache.set(key, signature, list(keyframes))
+        return keyframes
+
+    def _keyframes(self, file, video_track, background=False):
+        command = (
+            f'"{self.ffprobe}" -v error -select_streams {video_track} '
+            f'-show_entries packet=pts_time,flags -of csv=print_section=0 "{file}"'
+        )
+        result = self.scan(command, file) if background else self.execute(command)
+        if result.returncode != 0:
+            raise FlixError(f"Could not read keyframes of {file}: {result.stderr.decode('utf-8', errors='ignore')}")
+        start = self.source_start(file)
+        keyframes = set()
+        for line in result.stdout.decode("utf-8", errors="ignore").splitlines():
+            pts_time, _, flags = line.strip().partition(",")
+            if "K" not in flags:
+                continue
+            try:
+                keyframes.add(round(float(pts_time) - start, 6))
+            except ValueError:
+                continue
+        return tuple(sorted(keyframes))
+
+    def get_scene_cuts(self, file, video_track, threshold=0.4, background=False):
+        """
+        Sorted timestamps of the scene changes in the video track, counted from the start of the file like the
+        keyframes are, found once by decoding the whole track and then cached.
+        In the background the decode is a cancellable, low priority scan.
+        """
+        key = f"{Path(file).resolve()}|{video_track}|{threshold}|from_start"
+        try:
+            signature = self._probe_signature(file)
+        except OSError:
+            signature = None
+        if self.scene_cache and signature:
+            scene_cuts = self.scene_cache.get(key, signature)
+            if scene_cuts is not None:
+                logger.debug(f"Using cached scene cuts for {key}")
+                return tuple(scene_cuts)
+        scene_cuts = self._scene_cuts(file, video_track, threshold, background)
+        if self.scene_cache and signature:
+            self.scene_cache.set(key, signature, list(scene_cuts))
+        return scene_cuts
+
+    def _scene_cuts(self, file, video_track, threshold, background=False):
+        # Every frame is still decoded at full size, shrinking them only makes comparing the frames cheap.
+        # The timestamps are kept as they are in the file, so they are moved to the start the same way as keyframes
+        command = (
+            f'"{self.ffmpeg}" -hide_banner -nostats -copyts -i "{file}" -map 0:{video_track} -an -sn -dn '
+            f"-vf \"scale=160:-2,select='gt(scene,{threshold})',showinfo\" -f null -"
+        )
+        result = self.scan(command, file) if background else self.execute(command)
+        if result.returncode != 0:
+            raise FlixError(f"Could not find scene cuts of {file}: {result.stderr.decode('utf-8', errors='ignore')}")
+        start = self.source_start(file)
+        scene_cuts = set()
+        for line in result.stderr.decode("utf-8", errors="ignore").splitlines():
+            if "Parsed_showinfo" not in line or "pts_time:" not in line:
+                continue
+            try:
+                scene_cuts.add(round(float(line.split("pts_time:", 1)[1].split()[0]) - start, 6))
+            except (ValueError, IndexError):
+                continue
+        return tuple(sorted(scene_cuts))
+
+    def detect_crop(self, source, video_track, duration, width, height, samples=10, frames=5):
+        """
+        Find the black bars of the source by running cropdetect at evenly spaced points of the timeline,
+        several points at a time on the thread pool.
+
+        Samples that would crop away more than half the frame (fades to black, dark scenes) are ignored,
+        the rest are combined by keeping the smallest border found on each side,
+        so nothing a single sample saw as picture is cropped off.
+        """
+        times = [round(duration * (index + 0.5) / samples, 3) for index in range(samples)]
+        detected = [
+            crop
+            for crop in self.tp.map(lambda start: self._crop_sample(source, video_track, start, frames), times)
+            if crop and crop[0] * crop[1] >= width * height / 2
+        ]
+        if not detected:
+            raise FlixError("Could not detect black bars, no usable samples found")
+        return Box(
+            top=max(min(y for _, _, _, y in detected), 0),
+            left=max(min(x for _, _, x, _ in detected), 0),
+            right=max(min(width - x - w for w, _, x, _ in detected), 0),
+            bottom=max(min(height - y - h for _, h, _, y in detected), 0),
+        )
+
+    def _crop_sample(self, source, video_track, start_time, frames):
+        result = self.execute(
+            f'"{self.ffmpeg}" -hide_banner -ss {start_time} -i "{source}" -map 0:{video_track} '
+            f"-vf cropdetect=round=2 -frames:v {frames} -an -sn -dn -f null -"
+        )
+        crop = None
+        for line in result.stderr.decode("utf-8", errors="ignore").splitlines():
+            if "crop=" in line:
+                try:
+                    crop = [int(value) for value in line.rsplit("crop=", 1)[1].strip().split(":")]
+                except ValueError:
+                    continue
+        if crop and len(crop) == 4 and crop[0] > 0 and crop[1] > 0:
+            return crop
+
+    def get_filmstrip(self, file, video_track, count):
+        """Return the cached filmstrip image data for the source, or None if it needs to be generated"""
+        if not self.filmstrip_cache:
+            return None
+        try:
+            signature = self._probe_signature(file)
+        except OSError:
+            return None
+        image = self.filmstrip_cache.get(f"{Path(file).resolve()}|{video_track}|{count}", signature)
+        if image:
+            return base64.b64decode(image)
+
+    def save_filmstrip(self, file, video_track, count, image_data):
+        if not self.filmstrip_cache:
+            return
+        try:
+            signature = self._probe_signature(file)
+        except OSError:
+            return
+        self.filmstrip_cache.set(
+            f"{Path(file).resolve()}|{video_track}|{count}", signature, base64.b64encode(image_data).decode("ascii")
+        )
 
     def probe(self, file):
+        return self._cached_probe(file, "probe", lambda: self._probe(file))
+
+    def _probe(self, file):
         command = f'"{self.ffprobe}" -v quiet -print_format json -show_format -show_streams "{file}"'
         logger.debug(f"running probe command: {command}")
         result = self.execute(command)
@@ -96,6 +439,10 @@ class Flix:
             raise FlixError(result.stderr)
 
     def ffmpeg_configuration(self):
+        config, version = self._ffmpeg_version_config()
+        return config, self._ffmpeg_filters(), version
+
+    def _ffmpeg_version_config(self):
         res = self.execute(f'"{self.ffmpeg}" -version')
         if res.returncode != 0:
             raise FlixError(f'"{self.ffmpeg}" file not found')
@@ -106,7 +453,9 @@ class Flix:
         for line in output.split("\n"):
             if line.startswith(line_denote):
                 config = [x[9:].strip() for x in line[len(line_denote) :].split(" ") if x.startswith("--enable")]
+        return config, version
 
+    def _ffmpeg_filters(self):
         filter_output = self.execute(f'"{self.ffmpeg}" -hide_banner -filters').stdout.decode("utf-8")
 
         filters = []
@@ -114,17 +463,75 @@ class Flix:
             if i < 8 or not line.strip():
                 continue
             filters.append(line.strip().split(" ")[1])
-
-        return config, filters, version
+        return filters
 
     def extract_attachment(self, args):
         file, stream, work_dir, file_name = args
         self.execute(f'{self.ffmpeg} -y -i "{file}" -map 0:{stream} -c copy "{file_name}"', work_dir=work_dir)
 
+    def extract_attachments(self, file, attachments, work_dir=None):
+        """Write every (stream index, file name) attachment pair out of the source with a single FFmpeg run"""
+        if not attachments:
+            return
+        outputs = " ".join(f'-map 0:{stream} -c copy -frames:v 1 "{file_name}"' for stream, file_name in attachments)
+        self.execute(f'"{self.ffmpeg}" -y -i "{file}" {outputs}', work_dir=work_dir)
+
     def parse(self, file, work_dir=None, extract_covers=False):
         data = self.probe(file)
         if "streams" not in data:
             raise FlixError("Not a video file")
+        streams = self._split_streams(file, data, work_dir=work_dir, extract_covers=extract_covers)
+        return streams, data.format
+
+    def parse_combined(self, file, work_dir=None, extract_covers=False, video_track=0):
+        """
+        Gather streams, format and HDR side data from a single ffprobe run.
+        Falls back to the separate parse / parse_hdr_details calls if the combined output is unusable.
+        """
+        try:
+            data = self._cached_probe(file, "probe_frames", lambda: self._probe_with_frames(file))
+        except FlixError:
+            data = None
+        if not data or "streams" not in data:
+            logger.warning("Combined probe failed, falling back to separate stream and HDR probes")
+            streams, format_info = self.parse(file, work_dir=work_dir, extract_covers=extract_covers)
+            return streams, format_info, self.parse_hdr_details(file, video_track=video_track)
+
+        streams = self._split_streams(file, data, work_dir=work_dir, extract_covers=extract_covers)
+        if len(streams.video) <= video_track:
+            return streams, data.format, None
+
+        stream_index = streams.video[video_track].index
+        for frame in data.get("frames", []):
+            if frame.get("stream_index") == stream_index:
+                return streams, data.format, self._hdr_details(frame)
+
+        logger.debug("No video frame found in combined probe, running separate HDR probe")
+        return streams, data.format, self.parse_hdr_details(file, video_track=video_track)
+
+    def _probe_with_frames(self, file, read_packets=10):
+        command = (
+            f'"{self.ffprobe}" -v quiet -print_format json -show_format -show_streams -show_frames '
+            f'-read_intervals "%+#{read_packets}" "{file}"'
+        )
+        logger.debug(f"running combined probe command: {command}")
+        result = self.execute(command)
+        try:
+            data = Box.from_json(result.stdout.decode("utf-8"))
+        except BoxError:
+            logger.error(f"Could not decode output: {result.stderr}")
+            raise FlixError(result.stderr)
+
+        # Only the first decoded frame of each video stream is needed, don't keep audio frames around
+        frames, seen = [], set()
+        for frame in data.get("frames", []):
+            if frame.get("media_type") == "video" and frame.get("stream_index") not in seen:
+                seen.add(frame.get("stream_index"))
+                frames.append(frame)
+        data.frames = frames
+        return data
+
+    def _split_streams(self, file, data, work_dir=None, extract_covers=False):
         streams = Box({"video": [], "audio": [], "subtitle": [], "attachment": [], "data": []})
 
         covers = []
@@ -132,7 +539,7 @@ class Flix:
             if track.codec_type == "video" and track.get("disposition", {}).get("attached_pic"):
                 filename = track.get("tags", {}).get("filename", "")
                 if filename.rsplit(".", 1)[0] in ("cover", "small_cover", "cover_land", "small_cover_land"):
-                    covers.append((file, track.index, work_dir, filename))
+                    covers.append((track.index, filename))
                 streams.attachment.append(track)
             elif track.codec_type in streams:
                 streams[track.codec_type].append(track)
@@ -140,14 +547,14 @@ class Flix:
                 logger.error(f"Unknown codec: {track.codec_type}")
 
         if extract_covers:
-            self.tp.map(self.extract_attachment, covers)
+            self.extract_attachments(file, covers, work_dir=work_dir)
 
         for stream in streams.video:
             if "bits_per_raw_sample" in stream:
                 stream.bit_depth = int(stream.bits_per_raw_sample)
             else:
                 stream.bit_depth = guess_bit_depth(stream.pix_fmt, stream.get("color_primaries"))
-        return streams, data.format
+        return streams
 
     @staticmethod
     def generate_filters(
@@ -171,15 +578,42 @@ class Flix:
 
         return ",".join(filter_list)
 
-    def generate_thumbnail_command(self, source, output, video_track, start_time=0, filters=None):
-        start = ""
+    def generate_thumbnail_command(
+        self, source, output, video_track, start_time=0, filters=None, fast_seek=False, keyframes=None
+    ):
+        """
+        Without an output file the frame is written to stdout as a PPM image.
+        fast_seek only decodes the keyframe at or before start_time, for quick scrubbing.
+        With a keyframe index the input is opened at the previous keyframe and only the frames up to start_time
+        are decoded.
+        """
+        start, offset = "", ""
         if start_time:
             start = f"-ss {start_time}"
+        if fast_seek:
+            start = f"-skip_frame nokey -noaccurate_seek {start}"
+        elif start_time and keyframes:
+            keyframe = previous_keyframe(keyframes, start_time)
+            if keyframe:
+                start, offset = f"-ss {keyframe}", f"-ss {round(start_time - keyframe, 6)}"
+        destination = f'"{output}"' if output else "-f image2pipe -c:v ppm -"
         return (
-            f'"{self.ffmpeg}" {start} -loglevel error -i "{source}" '
+            f'"{self.ffmpeg}" {start} -loglevel error -i "{source}" {offset} '
             f' -vf {filters + "," if filters else ""}scale="min(320\\,iw):-1" '
             f"-map 0:{video_track} -an -y -map_metadata -1 "
-            f'-vframes 1 "{output}"'
+            f"-vframes 1 {destination}"
+        )
+
+    def generate_filmstrip_command(self, source, video_track, duration, count=10, width=160):
+        """
+        Single FFmpeg run that tiles count evenly spaced frames side by side into one PPM image on stdout.
+        Only keyframes are decoded, so every tile is the closest keyframe to its point on the timeline.
+        """
+        return (
+            f'"{self.ffmpeg}" -skip_frame nokey -loglevel error -i "{source}" '
+            f"-map 0:{video_track} -an -sn -dn -map_metadata -1 "
+            f'-vf "fps={count}/{max(float(duration), 1):.3f},scale={width}:-2,tile={count}x1" '
+            f"-frames:v 1 -f image2pipe -c:v ppm -"
         )
 
     @staticmethod
@@ -188,6 +622,9 @@ class Flix:
         return run(command, stdout=PIPE, stderr=PIPE, stdin=PIPE, shell=True, cwd=work_dir)
 
     def get_audio_encoders(self):
+        return self.audio_encoders
+
+    def _audio_encoders(self):
         cmd = run(
             [f"{self.ffmpeg}", "-hide_banner", "-encoders"],
             stdin=PIPE,
@@ -208,6 +645,14 @@ class Flix:
         return encoders
 
     def parse_hdr_details(self, video_source, video_track=0):
+        try:
+            return self._cached_probe(
+                video_source, f"hdr_{video_track}", lambda: self._parse_hdr_details(video_source, video_track)
+            )
+        except FlixError:
+            return
+
+    def _parse_hdr_details(self, video_source, video_track=0):
         command = (
             f'"{self.ffprobe}" -select_streams v:{video_track} -print_format json -show_frames '
             '-read_intervals "%+#1" '
@@ -224,10 +669,14 @@ class Flix:
                 "COULD NOT PARSE FFPROBE HDR METADATA, PLEASE OPEN ISSUE WITH THESE DETAILS:"
                 f"\nSTDOUT: {result.stdout.decode('utf-8')}\nSTDERR: {result.stderr.decode('utf-8')}"
             )
-            return
+            raise FlixError("Could not parse HDR details")
         if "frames" not in data or not len(data.frames):
             return
-        data = data.frames[0]
+        return self._hdr_details(data.frames[0])
+
+    @staticmethod
+    def _hdr_details(frame):
+        data = Box(frame, default_box=True, default_box_attr=None)
         if not data.get("side_data_list"):
             return
 
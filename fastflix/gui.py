@@ -1,33 +1,29 @@
 # -*- coding: utf-8 -*-
+# Imported first so every import after it can be timed when profiling the start up
+from fastflix import startup  # isort:skip
+
 import logging
 import os
 import shutil
 import sys
 import traceback
-from distutils.version import StrictVersion
 from json import JSONDecodeError
 from multiprocessing import Process, Queue, freeze_support
 from pathlib import Path
-from queue import Empty
-
-try:
-    import pkg_resources.py2_warn  # Needed for pyinstaller on 3.8
-except ImportError:
-    pass
+from queue import Queue as LocalQueue
+from threading import Thread
 
+# Only what the core process needs is imported here, this module is imported again by the GUI process on
+# systems that spawn processes. Qt, the widgets and anything else only the GUI uses are imported in start_app.
 try:
-    import coloredlogs
-    import requests
     import reusables
     from appdirs import user_data_dir
     from box import Box
-    from qtpy import API, QT_VERSION, QtCore, QtWidgets
 
+    from fastflix.config import file_date, load_config
     from fastflix.flix import Flix, FlixError
-    from fastflix.shared import base_path, error_message, file_date, latest_fastflix, message
+    from fastflix.job_queue import Job, JobQueue
     from fastflix.version import __version__
-    from fastflix.widgets.command_runner import BackgroundRunner
-    from fastflix.widgets.container import Container
 except ImportError as err:
     traceback.print_exc()
     print("Could not load FastFlix properly!", file=sys.stderr)
@@ -36,6 +32,9 @@ except ImportError as err:
 
 
 def main():
+    import coloredlogs
+
+    startup.begin("core")
     logging.basicConfig(level=logging.DEBUG)
     data_path = Path(user_data_dir("FastFlix", appauthor=False, roaming=True))
     data_path.mkdir(parents=True, exist_ok=True)
@@ -50,12 +49,30 @@ def main():
         log_queue.put(msg)
         logger.log(level, msg)
 
-    runner = BackgroundRunner(log_queue=log_queue)
+    # Everything the core reacts to arrives on this queue, so it only wakes up when there is something to do
+    events = LocalQueue()
+
+    config = load_config(data_path)
+    job_queue = JobQueue(
+        log_queue=log_queue,
+        exit_callback=lambda job, process: events.put(("job_exit", job, process)),
+        concurrent_jobs=config.get("concurrent_jobs"),
+        chunk_workers=config.get("chunk_workers"),
+        progress_callback=lambda report: status_queue.put(("progress", report)),
+        tee_dir=log_dir if config.get("debug_encoder_output") else None,
+        state_file=data_path / "job_queue.json",
+    )
+    startup.mark("job queue ready")
     gui_proc = Process(target=start_app, args=(queue, status_queue, log_queue, data_path, log_dir))
     gui_proc.start()
+    startup.mark("gui process started")
     logger = logging.getLogger("fastflix-core")
     coloredlogs.install(level="DEBUG", logger=logger)
     logger.info(f"Starting FastFlix {__version__}")
+    logger.debug(f"Running up to {job_queue.concurrent_jobs} encoding job(s) at once")
+    if job_queue.unfinished:
+        logger.info(f"Found {len(job_queue.unfinished)} unfinished job(s) from a previous run")
+        status_queue.put(("unfinished_jobs", [job.name for job in job_queue.unfinished]))
 
     for leftover in Path(data_path).glob(f"encoder_output_*.log"):
         try:
@@ -63,63 +80,96 @@ def main():
         except OSError:
             pass
 
-    sent_response = True
-    gui_close_message = False
-    queued_requests = []
+    def forward_requests():
+        while True:
+            events.put(("request", queue.get()))
+
+    def watch_gui():
+        gui_proc.join()
+        events.put(("gui_exit",))
+
+    Thread(target=forward_requests, daemon=True).start()
+    Thread(target=watch_gui, daemon=True).start()
+    startup.mark("waiting for events")
+    startup.report(logger)
+
+    def start_conversion_log():
+        log_queue.put("CLEAR_WINDOW")
+        reusables.remove_file_handlers(logger)
+        new_file_handler = reusables.get_file_handler(
+            log_dir / f"flix_conversion_{file_date()}.log",
+            level=logging.DEBUG,
+            log_format="%(asctime)s - %(message)s",
+            encoding="utf-8",
+        )
+        logger.addHandler(new_file_handler)
+
+    gui_alive = True
     while True:
-        if not gui_close_message and not gui_proc.is_alive():
-            gui_proc.join()
-            gui_close_message = True
-            if runner.is_alive() or queued_requests:
-                log("The GUI might have died, but I'm going to keep converting!", logging.WARNING)
-            else:
-                break
         try:
-            request = queue.get(block=True, timeout=0.01)
-        except Empty:
-            if not runner.is_alive() and not sent_response and not queued_requests:
-                ret = runner.process.poll()
-                if ret > 0:
-                    log(f"Error during conversion", logging.WARNING)
-                else:
-                    log("conversion complete")
-                reusables.remove_file_handlers(logger)
-                status_queue.put("complete")
-                sent_response = True
-
-                if not gui_proc.is_alive():
-                    return
+            event = events.get()
         except KeyboardInterrupt:
             status_queue.put("exit")
             return
-        else:
-            if request[0] == "command":
-                if runner.is_alive():
-                    queued_requests.append(request)
-                else:
-                    log_queue.put("CLEAR_WINDOW")
-                    reusables.remove_file_handlers(logger)
-                    new_file_handler = reusables.get_file_handler(
-                        log_dir / f"flix_conversion_{file_date()}.log",
-                        level=logging.DEBUG,
-                        log_format="%(asctime)s - %(message)s",
-                        encoding="utf-8",
+        if event[0] == "gui_exit":
+            gui_alive = False
+            if job_queue.active:
+                log("The GUI might have died, but I'm going to keep converting!", logging.WARNING)
+            else:
+                break
+        elif event[0] == "request":
+            request = event[1]
+            if request[0] == "job":
+                if not job_queue.active:
+                    start_conversion_log()
+                job = job_queue.add(
+                    Job(
+                        commands=request[1]["commands"],
+                        work_dir=request[1]["work_dir"],
+                        duration=request[1].get("duration"),
+                        name=request[1].get("name", ""),
+                        files=request[1].get("files"),
                     )
-                    logger.addHandler(new_file_handler)
-                    runner.start_exec(*request[1:])
-                    sent_response = False
+                )
+                status_queue.put(("job_added", job.id, job.name, request[1].get("token")))
+            if request[0] == "resume_jobs":
+                if not job_queue.active:
+                    start_conversion_log()
+                for job in job_queue.resume_unfinished():
+                    # Tracked by the GUI like its own jobs, so it can cancel them and keeps their work files
+                    status_queue.put(("job_added", job.id, job.name, None))
+                    if job.finished:
+                        log(f"{job.name} had already finished every command")
+                        status_queue.put(("job_finished", job.id, job.status))
+                    else:
+                        log(f"Resuming {job.name} from command {job.position + 1} of {len(job.commands)}")
+            if request[0] == "discard_jobs":
+                job_queue.discard_unfinished()
             if request[0] == "cancel":
-                queued_requests = []
-                runner.kill()
+                job_queue.cancel()
                 status_queue.put("cancelled")
-                sent_response = True
-        if not runner.is_alive():
-            if queued_requests:
-                runner.start_exec(*queued_requests.pop()[1:])
-                sent_response = False
+        elif event[0] == "job_exit":
+            job = job_queue.command_exited(event[1], event[2])
+            if not job:
+                continue
+            if job.status == "error":
+                log(f"Error during conversion of {job.name}", logging.WARNING)
+            else:
+                log(f"{job.name} conversion complete")
+            status_queue.put(("job_finished", job.id, job.status))
+            if not job_queue.active:
+                reusables.remove_file_handlers(logger)
+                if not gui_alive:
+                    return
 
 
 def required_info(logger, data_path, log_dir):
+    from distutils.version import StrictVersion
+
+    from qtpy import QtWidgets
+
+    from fastflix.shared import error_message, message
+
     if reusables.win_based:
         # This fixes the taskbar icon not always appearing
         try:
@@ -234,18 +284,22 @@ def required_info(logger, data_path, log_dir):
         logger.info(f"Using FFprobe {ffprobe}")
 
     try:
-        flix = Flix(ffmpeg=ffmpeg, ffprobe=ffprobe)
+        flix = Flix(ffmpeg=ffmpeg, ffprobe=ffprobe, data_path=data_path)
     except FlixError:
         error_message("FFmpeg or FFmpeg could not be executed properly!<br>", traceback=True)
         sys.exit(1)
+    startup.mark("ffmpeg ready")
 
-    if not config.get("disable_update_check"):
-        latest_fastflix()
-
-    return flix, work_dir, config_file
+    return flix, work_dir, config_file, config
 
 
 def start_app(queue, status_queue, log_queue, data_path, log_dir):
+    startup.begin("gui")
+    startup.mark("gui process running")
+    import coloredlogs
+    from qtpy import API, QT_VERSION, QtCore, QtWidgets
+
+    startup.mark("qt imported")
     logger = logging.getLogger("fastflix")
     coloredlogs.install(level="DEBUG", logger=logger)
 
@@ -255,12 +309,17 @@ def start_app(queue, status_queue, log_queue, data_path, log_dir):
         main_app = QtWidgets.QApplication(sys.argv)
         main_app.setStyle("fusion")
         main_app.setApplicationDisplayName("FastFlix")
+        startup.mark("application created")
+
+        from fastflix.widgets.container import Container
+
+        startup.mark("widgets imported")
 
         # timer = QtCore.QTimer()
         # timer.timeout.connect(lambda: None)
         # timer.start(100)
 
-        flix, work_dir, config_file = required_info(logger, data_path, log_dir)
+        flix, work_dir, config_file, config = required_info(logger, data_path, log_dir)
         window = Container(
             flix=flix,
             source=sys.argv[1] if len(sys.argv) > 1 else "",
@@ -273,7 +332,18 @@ def start_app(queue, status_queue, log_queue, data_path, log_dir):
             main_app=main_app,
         )
         main_app.setWindowIcon(window.icon)
+        startup.mark("window built")
         window.show()
+        if not config.get("disable_update_check"):
+            # Answered later through a signal, a slow or unreachable GitHub never holds up the window
+            window.check_for_update()
+
+        def first_paint():
+            # Zero length timers only fire once the events queued by show, including the first paint, are done
+            startup.mark("first paint")
+            startup.report(logger)
+
+        QtCore.QTimer.singleShot(0, first_paint)
         main_app.exec_()
     except (Exception, BaseException, SystemError, SystemExit) as err:
         logger.exception(f"HARD FAIL: Unexpected error: {err}")
@@ -283,6 +353,8 @@ def start_app(queue, status_queue, log_queue, data_path, log_dir):
 
 
 def windows_download_ffmpeg(ffmpeg_folder):
+    import requests
+
     ffmpeg_folder.mkdir(exist_ok=True)
     url = (
         "https://github.com/BtbN/FFmpeg-Builds/releases/download/"
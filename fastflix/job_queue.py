@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+import glob
+import itertools
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from collections import deque
+from pathlib import Path
+
+from fastflix.widgets.command_runner import BackgroundRunner
+
+__all__ = ["Job", "JobQueue", "default_concurrent_jobs", "default_chunk_workers"]
+
+logger = logging.getLogger("fastflix-core")
+
+# Rough number of threads a single encoder keeps busy before adding more stops helping
+encoder_threads = 8
+# AV1 encoders stop scaling after a handful of threads, so chunks of one encode are given fewer each
+chunk_threads = 4
+
+job_ids = itertools.count(1)
+
+quoted_path = re.compile(r'"([^"]+)"')
+
+
+def default_concurrent_jobs(cpu_count=None):
+    return max(1, (cpu_count or os.cpu_count() or 1) // encoder_threads)
+
+
+def default_chunk_workers(cpu_count=None):
+    return max(2, (cpu_count or os.cpu_count() or 1) // chunk_threads)
+
+
+def step_complete(status):
+    if isinstance(status, list):
+        return all(chunk_status == "complete" for chunk_status in status)
+    return status == "complete"
+
+
+class Job:
+    """
+    Commands to run one after another. A step can also be a list of commands, such as the chunks of a chunked
+    encode, which are independent of each other and run side by side.
+    Files {path: content} that the commands read, like the chunk list of a join, are written before each step.
+    """
+
+    def __init__(self, commands, work_dir, duration=None, name="", command_status=None, resumed=False, files=None):
+        self.id = next(job_ids)
+        self.name = name or f"Job {self.id}"
+        self.commands = [list(step) if isinstance(step, (list, tuple)) else step for step in commands]
+        self.work_dir = work_dir
+        self.duration = duration
+        self.command_status = command_status or [
+            ["pending"] * len(step) if isinstance(step, list) else "pending" for step in self.commands
+        ]
+        self.position = 0
+        self.status = "queued"
+        self.return_code = None
+        self.runners = {}
+        self.step_started = None
+        self.resumed = resumed
+        self.files = files or {}
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            commands=self.commands,
+            work_dir=str(self.work_dir),
+            duration=self.duration,
+            command_status=self.command_status,
+            files=self.files,
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(
+            commands=data["commands"],
+            work_dir=data["work_dir"],
+            duration=data.get("duration"),
+            name=data.get("name", ""),
+            command_status=data.get("command_status"),
+            resumed=True,
+            files=data.get("files"),
+        )
+        job.position = job.resume_position()
+        return job
+
+    def resume_position(self):
+        """
+        First step that still has to run. Completed steps are skipped unless a file they wrote to the work
+        directory is gone, like the pass log of a first pass or a GIF palette, as later steps would need it.
+        Finished chunks of a parallel step whose chunk file is gone are queued again on their own.
+        """
+        position = next(
+            (index for index, status in enumerate(self.command_status) if not step_complete(status)),
+            len(self.commands),
+        )
+        for index in range(min(position + 1, len(self.commands))):
+            step = self.commands[index]
+            if isinstance(step, list):
+                # Only the chunks whose files are gone are encoded again, before the steps that join them
+                lost = [
+                    chunk
+                    for chunk, command in enumerate(step)
+                    if self.command_status[index][chunk] == "complete" and self.missing_files(command)
+                ]
+                if lost:
+                    logger.info(f"{len(lost)} chunk(s) of command {index + 1} of {self.name} are gone, encoding again")
+                    self.reset_from(index + 1)
+                    for chunk in lost:
+                        self.command_status[index][chunk] = "pending"
+                    return index
+                continue
+            if index == position:
+                break
+            missing = self.missing_files(step)
+            if missing:
+                logger.info(f"{missing[0].name} from command {index + 1} of {self.name} is gone, running it again")
+                self.reset_from(index)
+                return index
+        return position
+
+    def missing_files(self, step):
+        """Files in the work directory that a command names but that no longer exist"""
+        work_dir = Path(self.work_dir)
+        missing = []
+        for path in quoted_path.findall(" ".join(step) if isinstance(step, list) else step):
+            if path in self.files:
+                # Written again before the step runs
+                continue
+            path = Path(path)
+            if work_dir not in path.parents:
+                continue
+            # Pass logs are named by a prefix that FFmpeg adds its own endings to
+            if not path.exists() and not any(path.parent.glob(f"{glob.escape(path.name)}*")):
+                missing.append(path)
+        return missing
+
+    def reset_from(self, index):
+        """Everything after a step depends on it, so it all has to run again"""
+        for later in range(index, len(self.commands)):
+            step = self.commands[later]
+            self.command_status[later] = ["pending"] * len(step) if isinstance(step, list) else "pending"
+
+    @property
+    def current_step(self):
+        return self.commands[self.position]
+
+    @property
+    def parallel(self):
+        return isinstance(self.current_step, list)
+
+    @property
+    def pending_chunks(self):
+        running = {chunk for chunk, _ in self.runners.values()}
+        return [
+            chunk
+            for chunk, status in enumerate(self.command_status[self.position])
+            if status != "complete" and chunk not in running
+        ]
+
+    @property
+    def finished(self):
+        return self.status in ("complete", "error", "cancelled")
+
+
+class JobQueue:
+    """
+    First in, first out queue of encoding jobs, with up to concurrent_jobs of them running at once.
+    The steps of a job always run one after another, in order, and a failed command stops its job.
+    The commands of a parallel step are spread over up to chunk_workers processes.
+
+    Nothing here blocks or polls, exit_callback(job, process) is called from a reader thread when a command ends
+    and the owner has to hand it back to command_exited from its own loop.
+
+    With a state_file the unfinished jobs and the status of each of their commands are saved after every change,
+    jobs found there on start up are kept in unfinished until they are resumed or discarded.
+    """
+
+    def __init__(
+        self,
+        log_queue,
+        exit_callback,
+        concurrent_jobs=None,
+        progress_callback=None,
+        tee_dir=None,
+        buffer_lines=1000,
+        state_file=None,
+        chunk_workers=None,
+    ):
+        self.log_queue = log_queue
+        self.exit_callback = exit_callback
+        self.concurrent_jobs = max(1, concurrent_jobs or default_concurrent_jobs())
+        self.chunk_workers = max(1, chunk_workers or default_chunk_workers())
+        self.progress_callback = progress_callback
+        self.tee_dir = tee_dir
+        self.buffer_lines = buffer_lines
+        self.state_file = Path(state_file) if state_file else None
+        self.queued = deque()
+        self.running = []
+        # Jobs left over from a previous run, kept on disk until they are resumed or discarded
+        self.unfinished = self.load()
+
+    @property
+    def active(self):
+        return bool(self.queued or self.running)
+
+    def add(self, job):
+        logger.info(f"Queued {job.name} with {len(job.commands)} command(s)")
+        self.queued.append(job)
+        self.fill()
+        self.save()
+        return job
+
+    def resume_unfinished(self):
+        jobs, self.unfinished = self.unfinished, []
+        for job in jobs:
+            Path(job.work_dir).mkdir(parents=True, exist_ok=True)
+            self.add(job)
+        return jobs
+
+    def discard_unfinished(self):
+        self.unfinished = []
+        self.save()
+
+    def fill(self):
+        while self.queued and len(self.running) < self.concurrent_jobs:
+            job = self.queued.popleft()
+            if job.position >= len(job.commands):
+                job.status = "complete"
+                continue
+            job.status = "running"
+            self.running.append(job)
+            self.start_step(job)
+
+    def new_runner(self, job, chunk=None):
+        return BackgroundRunner(
+            log_queue=self.log_queue,
+            exit_callback=lambda process: self.exit_callback(job, process),
+            tee_dir=self.tee_dir,
+            buffer_lines=self.buffer_lines,
+            progress_callback=self.job_progress(job, chunk),
+        )
+
+    def job_progress(self, job, chunk=None):
+        if not self.progress_callback:
+            return None
+
+        def progress(report):
+            report.update(job=job.id, command=job.position + 1, commands=len(job.commands), chunk=chunk)
+            if chunk is not None:
+                # Chunks only know their own progress, so the step is measured by how many chunks are done
+                statuses = job.command_status[job.position]
+                done = sum(status == "complete" for status in statuses)
+                report.update(percent=round(done / len(statuses) * 100, 2), eta=None, finished=False)
+                if done:
+                    elapsed = time.monotonic() - job.step_started
+                    report["eta"] = round(elapsed / done * (len(statuses) - done), 1)
+            self.progress_callback(report)
+
+        return progress
+
+    def write_files(self, job):
+        for path, content in job.files.items():
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                Path(path).write_text(content, encoding="utf-8")
+            except OSError:
+                logger.exception(f"Could not write {path} for {job.name}")
+
+    def start_step(self, job):
+        job.step_started = time.monotonic()
+        self.write_files(job)
+        if not job.parallel:
+            logger.info(f"Starting command {job.position + 1} of {len(job.commands)} for {job.name}")
+            runner = self.new_runner(job)
+            job.runners = {id(runner): (None, runner)}
+            self.start_command(job, runner, None)
+        else:
+            pending = job.pending_chunks
+            logger.info(
+                f"Starting command {job.position + 1} of {len(job.commands)} for {job.name}, "
+                f"{len(pending)} chunk(s) on up to {self.chunk_workers} workers"
+            )
+            job.runners = {}
+            for chunk in pending[: self.chunk_workers]:
+                runner = self.new_runner(job, chunk)
+                job.runners[id(runner)] = (chunk, runner)
+                self.start_command(job, runner, chunk)
+        self.save()
+
+    def start_command(self, job, runner, chunk):
+        if chunk is None:
+            job.command_status[job.position] = "running"
+            runner.start_exec(job.current_step, job.work_dir, job.duration)
+        else:
+            job.command_status[job.position][chunk] = "running"
+            runner.start_exec(job.current_step[chunk], job.work_dir)
+
+    def command_exited(self, job, process):
+        """
+        Move the job along after one of its commands ended, and start waiting jobs in any free slots.
+        Returns the job if it has now finished, otherwise None.
+        """
+        if job.finished or job not in self.running:
+            return None
+        for key, (chunk, runner) in job.runners.items():
+            if runner.process is process:
+                break
+        else:
+            # A process that has already been replaced
+            return None
+        job.return_code = process.returncode
+        status = "complete" if job.return_code == 0 else "error"
+        if chunk is None:
+            job.command_status[job.position] = status
+        else:
+            job.command_status[job.position][chunk] = status
+
+        if job.return_code == 0 and chunk is not None:
+            del job.runners[key]
+            pending = job.pending_chunks
+            if pending:
+                job.runners[key] = (pending[0], runner)
+                self.start_command(job, runner, pending[0])
+                self.save()
+                return None
+            if job.runners:
+                self.save()
+                return None
+
+        if job.return_code == 0 and job.position + 1 < len(job.commands):
+            job.position += 1
+            self.start_step(job)
+            return None
+
+        for _, other in job.runners.values():
+            if other.is_alive():
+                other.kill()
+        job.runners = {}
+        job.status = "complete" if job.return_code == 0 else "error"
+        self.running.remove(job)
+        self.fill()
+        self.save()
+        return job
+
+    def cancel(self):
+        for job in self.queued:
+            job.status = "cancelled"
+        self.queued.clear()
+        for job in self.running:
+            job.status = "cancelled"
+            for _, runner in job.runners.values():
+                if runner.is_alive():
+                    runner.kill()
+        self.running = []
+        self.save()
+
+    def load(self):
+        if not self.state_file or not self.state_file.exists():
+            return []
+        try:
+            return [Job.from_dict(data) for data in json.loads(self.state_file.read_text(encoding="utf-8"))]
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.exception(f"Could not read unfinished jobs from {self.state_file}")
+            return []
+
+    def save(self):
+        """Write every job that is not finished yet, so they can be offered again if this process dies"""
+        if not self.state_file:
+            return
+        jobs = [job.to_dict() for job in itertools.chain(self.unfinished, self.running, self.queued)]
+        temp_file = self.state_file.with_name(f"{self.state_file.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            temp_file.write_text(json.dumps(jobs, indent=2), encoding="utf-8")
+            os.replace(temp_file, self.state_file)
+        except OSError:
+            logger.exception(f"Could not save job queue to {self.state_file}")
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from box import Box
+
+__all__ = ["SettingsSections", "sections"]
+
+sections = ("video", "filters", "audio", "subtitles", "attachments")
+
+# Large values that are only ever replaced as a whole, such as when a new source is loaded,
+# so they are compared by identity and left out of the debug log
+by_identity = ("streams", "format_info", "side_data", "keyframes", "scene_cuts")
+
+
+def same(key, old, new):
+    if key in by_identity:
+        return old is new
+    return old == new
+
+
+class SettingsSections:
+    """
+    The last gathered values of each section of the settings, such as the filters or the audio tracks.
+    Handing over a new gathering tells which sections changed, so the commands only have to be built again
+    when something that goes into them actually changed.
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+        self.version = 0
+
+    def update(self, gathered):
+        """
+        Keep the new values of each section, returning {section: {key: new value}} of only what changed.
+        Values are stored as given, they must not be changed in place afterwards.
+        """
+        changed = {}
+        for section, values in gathered.items():
+            old = self.snapshots.get(section)
+            if old is None:
+                difference = dict(values)
+            else:
+                difference = {
+                    key: value for key, value in values.items() if key not in old or not same(key, old[key], value)
+                }
+                difference.update({key: None for key in old if key not in values})
+            if difference:
+                changed[section] = difference
+                self.snapshots[section] = values
+        if changed:
+            self.version += 1
+        return changed
+
+    def settings(self):
+        """Every section merged into one Box, as the command builders take them"""
+        settings = Box()
+        for section in sections:
+            settings.update(self.snapshots.get(section, {}))
+        return settings
+
+    def clear(self):
+        self.snapshots = {}
+        self.version += 1
+
+    @staticmethod
+    def loggable(changed):
+        return {
+            section: {key: "<updated>" if key in by_identity else value for key, value in values.items()}
+            for section, values in changed.items()
+        }
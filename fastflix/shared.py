@@ -2,14 +2,12 @@
 import importlib.machinery
 import os
 import sys
-from datetime import datetime
-from distutils.version import StrictVersion
 from pathlib import Path
 
-import pkg_resources
-import requests
 import reusables
 
+from fastflix.config import file_date
+
 try:
     # PyInstaller creates a temp folder and stores path in _MEIPASS
     # noinspection PyUnresolvedReferences
@@ -26,7 +24,7 @@ QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_EnableHighDpiScaling, True)
 
 main_width = 800
 
-my_data = str(Path(pkg_resources.resource_filename(__name__, f"../data/icon.ico")).resolve())
+my_data = str(Path(__file__).parent / "data" / "icon.ico")
 icon = QtGui.QIcon(my_data)
 
 
@@ -81,27 +79,20 @@ def error_message(msg, details=None, traceback=False, title=None):
     em.exec_()
 
 
-def latest_fastflix(no_new_dialog=False):
-    from fastflix.version import __version__
-
-    url = "https://api.github.com/repos/cdgriffith/FastFlix/releases/latest"
-    data = requests.get(url).json()
-    if data["tag_name"] != __version__ and StrictVersion(data["tag_name"]) > StrictVersion(__version__):
-        portable, installer = None, None
-        for asset in data["assets"]:
-            if asset["name"].endswith("win64.zip"):
-                portable = asset["browser_download_url"]
-            if asset["name"].endswith("installer.exe"):
-                installer = asset["browser_download_url"]
-
+def update_message(update, no_new_dialog=False):
+    """Tell the user about the result of fastflix.update_check.check_for_update"""
+    if update is None:
+        if no_new_dialog:
+            message("Could not reach GitHub to check for a newer version of FastFlix", title="New Version")
+        return
+    if update["newer"]:
         download_link = ""
-        if installer:
-            download_link += f"<a href='{installer}'>Download FastFlix installer {data['tag_name']}</a><br>"
-        if portable:
-            download_link += f"<a href='{portable}'>Download FastFlix portable {data['tag_name']}</a><br>"
-        if (not portable and not installer) or not reusables.win_based:
-            html_link = data["html_url"]
-            download_link = f"<a href='{html_link}'>View FastFlix {data['tag_name']} now</a>"
+        if update["installer"]:
+            download_link += f"<a href='{update['installer']}'>Download FastFlix installer {update['version']}</a><br>"
+        if update["portable"]:
+            download_link += f"<a href='{update['portable']}'>Download FastFlix portable {update['version']}</a><br>"
+        if (not update["portable"] and not update["installer"]) or not reusables.win_based:
+            download_link = f"<a href='{update['html_url']}'>View FastFlix {update['version']} now</a>"
         message(
             f"There is a newer version of FastFlix available! <br> {download_link}",
             title="New Version",
@@ -109,7 +100,3 @@ def latest_fastflix(no_new_dialog=False):
         return
     if no_new_dialog:
         message("You are using the latest version of FastFlix")
-
-
-def file_date():
-    return datetime.now().isoformat().replace(":", ".").rsplit(".", 1)[0]
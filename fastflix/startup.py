@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Startup profiling
+
+Start FastFlix with --profile-startup (or with FASTFLIX_PROFILE_STARTUP=1 set) and each process logs how long
+its start up phases took and which imports were the slowest, and the GUI says whether the window was painted
+within first_paint_budget. Nothing is hooked when profiling is off.
+
+Importing this module is enough to start timing imports, so it has to be imported before anything else
+and must itself stay free of anything but the standard library.
+"""
+import os
+import sys
+import threading
+import time
+
+__all__ = ["enabled", "install", "begin", "mark", "report", "first_paint_budget"]
+
+# Seconds from launching FastFlix to the main window being painted, with FFmpeg already known to the capability cache
+first_paint_budget = 2.0
+
+profile_variable = "FASTFLIX_PROFILE_STARTUP"
+# Wall clock time the first FastFlix process started, handed down to the GUI process so both measure from launch
+launched_variable = "FASTFLIX_LAUNCHED"
+profile_flag = "--profile-startup"
+
+marks = []
+# Module name: (seconds including the modules it imported, seconds of its own)
+imports = {}
+
+_state = threading.local()
+_process = {"pid": os.getpid(), "name": "core"}
+
+
+def enabled():
+    return bool(os.environ.get(profile_variable))
+
+
+def elapsed():
+    return time.time() - float(os.environ.get(launched_variable, time.time()))
+
+
+class TimedLoader:
+    """Runs the real loader of a module, recording how long the module took to execute"""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        if hasattr(self.loader, "create_module"):
+            return self.loader.create_module(spec)
+        return None
+
+    def exec_module(self, module):
+        # The module itself should never see this wrapper as its loader
+        module.__loader__ = module.__spec__.loader = self.loader
+        stack = getattr(_state, "stack", None)
+        if stack is None:
+            stack = _state.stack = []
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - started
+            children = stack.pop()
+            imports[module.__name__] = (total, total - children)
+            if stack:
+                stack[-1] += total
+
+    def __getattr__(self, item):
+        return getattr(self.loader, item)
+
+
+class ImportTimer:
+    """Meta path finder that finds nothing itself, it only wraps the loaders the other finders return"""
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def install():
+    if profile_flag in sys.argv:
+        sys.argv.remove(profile_flag)
+        # Passed on through the environment so the GUI process profiles itself too
+        os.environ[profile_variable] = "1"
+    if not enabled():
+        return
+    os.environ.setdefault(launched_variable, str(time.time()))
+    if not any(isinstance(finder, ImportTimer) for finder in sys.meta_path):
+        sys.meta_path.insert(0, ImportTimer())
+
+
+def begin(name):
+    """Name the current process, dropping what a forked process was handed from its parent"""
+    if os.getpid() != _process["pid"]:
+        marks.clear()
+        imports.clear()
+        _process["pid"] = os.getpid()
+    _process["name"] = name
+
+
+def mark(phase):
+    if enabled():
+        marks.append((phase, elapsed()))
+
+
+def report(logger, slowest=20):
+    if not enabled():
+        return
+    lines = [f"Startup profile of the {_process['name']} process, seconds since launch:"]
+    previous = 0
+    for phase, at in marks:
+        lines.append(f"{at:9.3f} {at - previous:+9.3f}  {phase}")
+        previous = at
+    lines.append(
+        f"{len(imports)} modules imported in {sum(own for _, own in imports.values()):.3f}s, "
+        f"slowest including their own imports (total / self):"
+    )
+    for name, (total, own) in sorted(imports.items(), key=lambda item: item[1][0], reverse=True)[:slowest]:
+        lines.append(f"{total:9.3f} {own:9.3f}  {name}")
+    painted = dict(marks).get("first paint")
+    if painted is not None:
+        within = "within" if painted <= first_paint_budget else "OVER"
+        lines.append(f"First paint at {painted:.3f}s, {within} the {first_paint_budget}s budget")
+    logger.info("\n".join(lines))
+
+
+install()
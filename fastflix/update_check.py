@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Check GitHub for a newer release of FastFlix
+
+The answer from GitHub is kept for a day in the data directory, so only the first start of the day asks again.
+Nothing here needs Qt, the GUI runs check_for_update on a worker thread and gets the result through a signal.
+"""
+import json
+import logging
+import time
+from pathlib import Path
+
+__all__ = ["releases_url", "check_for_update", "fetch_latest_release"]
+
+logger = logging.getLogger("fastflix")
+
+releases_url = "https://api.github.com/repos/cdgriffith/FastFlix/releases/latest"
+
+# Seconds to wait for GitHub to answer at all, and between bytes of its answer
+request_timeout = 5
+cache_seconds = 24 * 60 * 60
+
+
+def fetch_latest_release(url=releases_url, timeout=request_timeout):
+    """Only the parts of the release that are shown to the user"""
+    import requests
+
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    return dict(
+        tag_name=data["tag_name"],
+        html_url=data.get("html_url", ""),
+        assets={asset["name"]: asset["browser_download_url"] for asset in data.get("assets", [])},
+    )
+
+
+def cached_release(cache_file, url, max_age):
+    try:
+        cached = json.loads(Path(cache_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if cached.get("url") != url or not 0 <= time.time() - cached.get("checked", 0) < max_age:
+        return None
+    return cached.get("release")
+
+
+def save_release(cache_file, url, release):
+    try:
+        Path(cache_file).write_text(json.dumps(dict(url=url, checked=time.time(), release=release)), encoding="utf-8")
+    except OSError:
+        logger.warning(f"Could not save update check to {cache_file}")
+
+
+def is_newer(tag_name, current_version):
+    from distutils.version import StrictVersion
+
+    try:
+        return tag_name != current_version and StrictVersion(tag_name) > StrictVersion(current_version)
+    except ValueError:
+        logger.debug(f"Cannot compare release {tag_name} to version {current_version}")
+        return False
+
+
+def check_for_update(
+    current_version, cache_file=None, url=releases_url, timeout=request_timeout, max_age=cache_seconds
+):
+    """
+    Returns a dict of the latest release with newer set if it is newer than current_version,
+    and the installer and portable download links when there are any, or None if GitHub could not be reached.
+    A max_age of 0 always asks GitHub, such as when the user checks by hand.
+    """
+    release = cached_release(cache_file, url, max_age) if cache_file and max_age else None
+    if release:
+        logger.debug(f"Using update check from the last {max_age // 3600} hours")
+    else:
+        try:
+            release = fetch_latest_release(url, timeout)
+        except Exception as err:
+            logger.warning(f"Could not check for a newer version of FastFlix: {err}")
+            return None
+        if cache_file:
+            save_release(cache_file, url, release)
+
+    assets = release.get("assets", {})
+    return dict(
+        version=release["tag_name"],
+        newer=is_newer(release["tag_name"], current_version),
+        html_url=release.get("html_url", ""),
+        installer=next((link for name, link in assets.items() if name.endswith("installer.exe")), None),
+        portable=next((link for name, link in assets.items() if name.endswith("win64.zip")), None),
+    )
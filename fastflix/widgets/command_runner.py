@@ -4,70 +4,163 @@ import logging
 import re
 import secrets
 import shlex
+import time
+from collections import deque
 from pathlib import Path
 from subprocess import PIPE, Popen
-from threading import Thread
+from threading import Lock, Thread
 
 logger = logging.getLogger("fastflix-core")
 
-__all__ = ["BackgroundRunner"]
+__all__ = ["BackgroundRunner", "ProgressParser"]
 
 white_detect = re.compile(r"^\s+")
+progress_detect = re.compile(r"^(\w+)=(.*)$")
+
+
+class ProgressParser:
+    """
+    Collects the key=value blocks FFmpeg writes with -progress and reports each finished block as a dict of
+    frame, fps, bitrate, out_time and speed, plus the percent done and estimated seconds remaining
+    when the expected output duration is known.
+    """
+
+    def __init__(self, duration=None, callback=None):
+        self.duration = duration
+        self.callback = callback
+        self.started = time.monotonic()
+        self.values = {}
+
+    def feed(self, line):
+        """Returns False if the line is not part of the progress output"""
+        match = progress_detect.match(line)
+        if not match:
+            return False
+        key, value = match.group(1), match.group(2).strip()
+        if key != "progress":
+            self.values[key] = value
+            return True
+        report = self.report(finished=value == "end")
+        self.values = {}
+        if self.callback:
+            self.callback(report)
+        return True
+
+    def report(self, finished=False):
+        out_time = self.out_time()
+        report = dict(
+            frame=self.number("frame", int),
+            fps=self.number("fps", float),
+            bitrate=self.values.get("bitrate"),
+            out_time=out_time,
+            speed=self.number("speed", float, suffix="x"),
+            percent=None,
+            eta=None,
+            finished=finished,
+        )
+        if finished:
+            report.update(percent=100.0, eta=0)
+        elif self.duration and out_time:
+            report["percent"] = round(min(out_time / self.duration, 1) * 100, 2)
+            elapsed = time.monotonic() - self.started
+            report["eta"] = round(max(elapsed * (self.duration - out_time) / out_time, 0), 1)
+        return report
+
+    def number(self, key, kind, suffix=""):
+        try:
+            return kind(self.values[key].rstrip(suffix))
+        except (KeyError, ValueError):
+            return None
+
+    def out_time(self):
+        # out_time_ms is also in microseconds, FFmpeg kept the misleading name for compatibility
+        for key in ("out_time_us", "out_time_ms"):
+            microseconds = self.number(key, int)
+            if microseconds is not None:
+                return max(microseconds / 1_000_000, 0)
+        try:
+            hours, minutes, seconds = self.values["out_time"].split(":")
+            return max(int(hours) * 3600 + int(minutes) * 60 + float(seconds), 0)
+        except (KeyError, ValueError):
+            return None
 
 
 class BackgroundRunner:
-    def __init__(self, log_queue):
+    """
+    Runs one encoder command at a time, reading its stdout and stderr pipes on their own threads.
+    Output goes to the log and the GUI, and only the most recent lines are kept in memory.
+    With tee_dir set (debugging) the raw output is also written to a file there.
+    FFmpeg -progress output on stdout is not logged, it is parsed and handed to progress_callback instead.
+    """
+
+    def __init__(self, log_queue, exit_callback=None, tee_dir=None, buffer_lines=1000, progress_callback=None):
         self.process = None
         self.killed = False
-        self.output_file = None
-        self.error_output_file = None
         self.log_queue = log_queue
+        self.exit_callback = exit_callback
+        self.progress_callback = progress_callback
+        self.tee_dir = tee_dir
+        self.recent_output = deque(maxlen=buffer_lines)
+        self.output_lock = Lock()
 
-    def start_exec(self, command, work_dir):
+    def start_exec(self, command, work_dir, duration=None):
         logger.info(f"Running command: {command}")
-        self.output_file = Path(work_dir) / f"encoder_output_{secrets.token_hex(6)}.log"
-        self.error_output_file = Path(work_dir) / f"encoder_error_output_{secrets.token_hex(6)}.log"
+        self.recent_output.clear()
         self.process = Popen(
             shlex.split(command),
             cwd=work_dir,
-            stdout=open(self.output_file, "w"),
-            stderr=open(self.error_output_file, "w"),
+            stdout=PIPE,
+            stderr=PIPE,
             stdin=PIPE,  # FFmpeg can try to read stdin and wrecks havoc on linux
             encoding="utf-8",
+            errors="replace",
+            universal_newlines=True,  # Splits FFmpeg's carriage return status updates into lines
         )
-        Thread(target=self.read_output).start()
-
-    def read_output(self):
-        with open(self.output_file, "r") as out_file, open(self.error_output_file, "r") as err_file:
-            while True:
-                if not self.is_alive():
-                    excess = out_file.read()
-                    logger.info(excess)
-                    self.log_queue.put(excess)
-
-                    err_excess = err_file.read()
-                    logger.info(err_excess)
-                    self.log_queue.put(err_excess)
-                    break
-                line = out_file.readline().rstrip()
-                if line:
-                    logger.info(line)
-                    self.log_queue.put(line)
-
-                err_line = err_file.readline().rstrip()
-                if err_line:
-                    logger.info(err_line)
-                    self.log_queue.put(err_line)
+        tee_file = None
+        if self.tee_dir:
+            tee_file = open(Path(self.tee_dir) / f"encoder_output_{secrets.token_hex(6)}.log", "w", encoding="utf-8")
+        progress = ProgressParser(duration, self.progress_callback)
+        Thread(target=self.read_output, args=(self.process, tee_file, progress)).start()
+
+    def read_output(self, process, tee_file=None, progress=None):
+        readers = [
+            Thread(target=self.read_pipe, args=(process.stdout, tee_file, progress)),
+            Thread(target=self.read_pipe, args=(process.stderr, tee_file)),
+        ]
+        for reader in readers:
+            reader.start()
         try:
-            self.output_file.unlink()
-            self.error_output_file.unlink()
-        except OSError:
-            pass
+            for reader in readers:
+                reader.join()
+        finally:
+            if tee_file:
+                tee_file.close()
+            # Only reported once the remaining output has been logged
+            process.wait()
+            if self.exit_callback:
+                self.exit_callback(process)
+
+    def read_pipe(self, pipe, tee_file=None, progress=None):
+        for line in iter(pipe.readline, ""):
+            line = line.rstrip()
+            if not line:
+                continue
+            if tee_file:
+                with self.output_lock:
+                    tee_file.write(f"{line}\n")
+            if progress and progress.feed(line):
+                continue
+            with self.output_lock:
+                self.recent_output.append(line)
+            logger.debug(line)
+            self.log_queue.put(line)
+        pipe.close()
 
     def read(self, limit=None):
-        if not self.is_alive():
-            return
-        return self.process.stdout.read(limit)
+        """The most recent lines of output from the current command, oldest first"""
+        with self.output_lock:
+            lines = list(self.recent_output)
+        return lines[-limit:] if limit else lines
 
     def is_alive(self):
         if not self.process:
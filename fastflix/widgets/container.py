@@ -6,11 +6,12 @@ import sys
 from pathlib import Path
 from subprocess import run
 
-import pkg_resources
 import reusables
 from qtpy import QtCore, QtGui, QtWidgets
 
-from fastflix.shared import latest_fastflix, message
+from fastflix.shared import message, update_message
+from fastflix.update_check import cache_seconds, check_for_update
+from fastflix.version import __version__
 from fastflix.widgets.about import About
 from fastflix.widgets.changes import Changes
 from fastflix.widgets.logs import Logs
@@ -21,10 +22,14 @@ logger = logging.getLogger("fastflix")
 
 
 class Container(QtWidgets.QMainWindow):
+    update_checked = QtCore.Signal(object, bool)
+
     def __init__(self, data_path, work_path, config_file, main_app, **kwargs):
         super().__init__()
         self.app = main_app
+        self.data_path = data_path
         self.log_dir = data_path / "logs"
+        self.update_checker = None
         self.logs = Logs()
         self.changes = Changes()
         self.about = None
@@ -33,9 +38,10 @@ class Container(QtWidgets.QMainWindow):
         self.main = Main(self, data_path, work_path, **kwargs)
         self.setCentralWidget(self.main)
         self.setMinimumSize(1200, 600)
-        my_data = str(Path(pkg_resources.resource_filename(__name__, f"../data/icon.ico")).resolve())
+        my_data = str(Path(__file__).parent.parent / "data" / "icon.ico")
         self.icon = QtGui.QIcon(my_data)
         self.setWindowIcon(self.icon)
+        self.update_checked.connect(self.show_update)
 
     def closeEvent(self, a0: QtGui.QCloseEvent) -> None:
         if self.main.converting:
@@ -55,6 +61,9 @@ class Container(QtWidgets.QMainWindow):
                 a0.ignore()
                 return
 
+        self.main.thumbnail_scheduler.shutdown()
+        self.main.filmstrip_generator.cancel()
+        self.main.flix.cancel_scans()
         for item in self.main.path.work.iterdir():
             if item.is_dir() and item.stem.startswith("temp_"):
                 shutil.rmtree(item, ignore_errors=True)
@@ -73,6 +82,12 @@ class Container(QtWidgets.QMainWindow):
         setting_action.setShortcut("Ctrl+S")
         setting_action.triggered.connect(self.show_setting)
 
+        clear_cache_action = QtWidgets.QAction(
+            self.style().standardIcon(QtWidgets.QStyle.SP_TrashIcon), "Clear Probe Cache", self
+        )
+        clear_cache_action.setStatusTip("Forget stored FFprobe results so sources are probed again")
+        clear_cache_action.triggered.connect(self.clear_probe_cache)
+
         exit_action = QtWidgets.QAction(
             self.style().standardIcon(QtWidgets.QStyle.SP_DialogCancelButton), "&Exit", self
         )
@@ -81,6 +96,7 @@ class Container(QtWidgets.QMainWindow):
         exit_action.triggered.connect(self.close)
 
         file_menu.addAction(setting_action)
+        file_menu.addAction(clear_cache_action)
         file_menu.addSeparator()
         file_menu.addAction(exit_action)
 
@@ -112,7 +128,7 @@ class Container(QtWidgets.QMainWindow):
         version_action = QtWidgets.QAction(
             self.style().standardIcon(QtWidgets.QStyle.SP_BrowserReload), "Check for Newer Version of FastFlix", self
         )
-        version_action.triggered.connect(lambda: latest_fastflix(no_new_dialog=True))
+        version_action.triggered.connect(lambda: self.check_for_update(manual=True))
 
         help_menu = menubar.addMenu("&Help")
         help_menu.addAction(changes_action)
@@ -132,6 +148,10 @@ class Container(QtWidgets.QMainWindow):
         self.setting = Settings(self.config_file, self.main)
         self.setting.show()
 
+    def clear_probe_cache(self):
+        self.main.flix.clear_probe_cache()
+        message("Probe cache cleared")
+
     def show_logs(self):
         self.logs.show()
 
@@ -144,6 +164,15 @@ class Container(QtWidgets.QMainWindow):
     def show_log_dir(self):
         OpenFolder(self, self.log_dir).run()
 
+    def check_for_update(self, manual=False):
+        if self.update_checker and self.update_checker.isRunning():
+            return
+        self.update_checker = UpdateChecker(self, self.data_path / "update_check.json", manual)
+        self.update_checker.start()
+
+    def show_update(self, update, manual):
+        update_message(update, no_new_dialog=manual)
+
 
 class OpenFolder(QtCore.QThread):
     def __init__(self, parent, path):
@@ -169,3 +198,17 @@ class OpenFolder(QtCore.QThread):
             run(["open", self.path])
         else:
             run(["xdg-open", self.path])
+
+
+class UpdateChecker(QtCore.QThread):
+    """Asks GitHub for the latest release off the GUI thread, checking by hand skips the day long cache"""
+
+    def __init__(self, parent, cache_file, manual=False):
+        super().__init__(parent)
+        self.app = parent
+        self.cache_file = cache_file
+        self.manual = manual
+
+    def run(self):
+        update = check_for_update(__version__, cache_file=self.cache_file, max_age=0 if self.manual else cache_seconds)
+        self.app.update_checked.emit(update, self.manual)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from qtpy import QtCore, QtGui, QtWidgets
+
+__all__ = ["Filmstrip"]
+
+logger = logging.getLogger("fastflix")
+
+
+class Filmstrip(QtWidgets.QWidget):
+    """
+    Timeline of evenly spaced thumbnails for the open source.
+    Left clicking picks the start time and right clicking the end time, both are reported as seconds.
+    Scene cuts, once known, are marked along the bottom edge.
+    """
+
+    start_selected = QtCore.Signal(float)
+    end_selected = QtCore.Signal(float)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.pixmap = None
+        self.duration = 0
+        self.start_time = 0
+        self.end_time = 0
+        self.scene_cuts = ()
+        self.setFixedHeight(70)
+        self.setToolTip("Left click to set the start time, right click to set the end time")
+
+    def clear(self):
+        self.pixmap = None
+        self.duration = 0
+        self.scene_cuts = ()
+        self.update()
+
+    def set_filmstrip(self, image, duration):
+        self.pixmap = QtGui.QPixmap.fromImage(image)
+        self.duration = duration
+        self.update()
+
+    def set_scene_cuts(self, scene_cuts):
+        self.scene_cuts = scene_cuts or ()
+        self.update()
+
+    def set_selection(self, start_time, end_time):
+        self.start_time = start_time or 0
+        self.end_time = end_time or self.duration
+        self.update()
+
+    def strip_rect(self):
+        if not self.pixmap:
+            return QtCore.QRect()
+        size = self.pixmap.size().scaled(self.size(), QtCore.Qt.KeepAspectRatio)
+        return QtCore.QRect(
+            (self.width() - size.width()) // 2, (self.height() - size.height()) // 2, size.width(), size.height()
+        )
+
+    def position_to_time(self, x):
+        rect = self.strip_rect()
+        if not self.duration or rect.width() <= 0:
+            return None
+        return min(max((x - rect.left()) / rect.width(), 0), 1) * self.duration
+
+    def time_to_position(self, seconds):
+        if not self.duration:
+            return 0
+        rect = self.strip_rect()
+        return rect.left() + int(rect.width() * min(max(seconds / self.duration, 0), 1))
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent):
+        seconds = self.position_to_time(event.pos().x())
+        if seconds is None:
+            return super().mousePressEvent(event)
+        if event.button() == QtCore.Qt.LeftButton:
+            self.start_selected.emit(seconds)
+        elif event.button() == QtCore.Qt.RightButton:
+            self.end_selected.emit(seconds)
+
+    def paintEvent(self, event: QtGui.QPaintEvent):
+        if not self.pixmap:
+            return
+        painter = QtGui.QPainter(self)
+        rect = self.strip_rect()
+        painter.drawPixmap(rect, self.pixmap)
+
+        # Shade everything outside of the selected start and end times
+        start = self.time_to_position(self.start_time)
+        end = self.time_to_position(self.end_time or self.duration)
+        shade = QtGui.QColor(0, 0, 0, 150)
+        painter.fillRect(QtCore.QRect(rect.left(), rect.top(), start - rect.left(), rect.height()), shade)
+        painter.fillRect(QtCore.QRect(end, rect.top(), rect.right() - end, rect.height()), shade)
+        painter.setPen(QtGui.QPen(QtGui.QColor("#00aa00"), 2))
+        painter.drawLine(start, rect.top(), start, rect.bottom())
+        painter.setPen(QtGui.QPen(QtGui.QColor("#aa0000"), 2))
+        painter.drawLine(end, rect.top(), end, rect.bottom())
+
+        if self.duration:
+            painter.setPen(QtGui.QPen(QtGui.QColor("#ffcc00"), 1))
+            for cut in self.scene_cuts:
+                x = self.time_to_position(cut)
+                painter.drawLine(x, rect.bottom() - 8, x, rect.bottom())
+        painter.end()
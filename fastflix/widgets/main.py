@@ -3,50 +3,42 @@
 import importlib.machinery  # Needed for pyinstaller
 import logging
 import os
+import secrets
 import tempfile
 import time
 from datetime import timedelta
 from pathlib import Path
 
-import pkg_resources
 import reusables
 from box import Box
 from qtpy import QtCore, QtGui, QtWidgets
 
+from fastflix.encoders import load_plugins
 from fastflix.encoders.common import helpers
+from fastflix.encoders.common.helpers import previous_keyframe
 from fastflix.flix import FlixError
+from fastflix.settings_sections import SettingsSections
 from fastflix.shared import error_message, file_date
-from fastflix.widgets.thumbnail_generator import ThumbnailCreator
+from fastflix.widgets.filmstrip import Filmstrip
+from fastflix.widgets.thumbnail_generator import FilmstripGenerator, ThumbnailScheduler
 from fastflix.widgets.video_options import VideoOptions
 
 logger = logging.getLogger("fastflix")
 
 root = os.path.abspath(os.path.dirname(__file__))
-
-
-def load_plugins(configuration):
-    from fastflix.encoders.av1_aom import main as av1_plugin
-    from fastflix.encoders.avc_x264 import main as avc_plugin
-    from fastflix.encoders.gif import main as gif_plugin
-    from fastflix.encoders.hevc_x265 import main as hevc_plugin
-    from fastflix.encoders.rav1e import main as rav1e_plugin
-    from fastflix.encoders.svt_av1 import main as svt_av1_plugin
-    from fastflix.encoders.vp9 import main as vp9_plugin
-
-    plugins = [hevc_plugin, avc_plugin, gif_plugin, vp9_plugin, av1_plugin, rav1e_plugin, svt_av1_plugin]
-
-    return {
-        plugin.name: plugin
-        for plugin in plugins
-        if (not getattr(plugin, "requires", None)) or plugin.requires in configuration
-    }
+rotation_dir = Path(root).parent / "data" / "rotations"
 
 
 class Main(QtWidgets.QWidget):
-    completed = QtCore.Signal(int)
-    thumbnail_complete = QtCore.Signal(int)
+    job_added = QtCore.Signal(int, str, object)
+    job_finished = QtCore.Signal(int, str)
     cancelled = QtCore.Signal()
     close_event = QtCore.Signal()
+    keyframes_ready = QtCore.Signal(object, object)
+    scene_cuts_ready = QtCore.Signal(object, object)
+    crop_detected = QtCore.Signal(object)
+    encode_progress = QtCore.Signal(object)
+    unfinished_jobs = QtCore.Signal(object)
 
     def __init__(self, parent, data_path, work_path, worker_queue, status_queue, log_queue, flix, **kwargs):
         super().__init__(parent)
@@ -66,11 +58,18 @@ class Main(QtWidgets.QWidget):
         self.ffprobe = flix.ffprobe
         self.only_int = QtGui.QIntValidator()
 
+        # Started once every signal it emits is connected, Qt drops signals emitted before that
         self.notifier = Notifier(self, self.status_queue)
-        self.notifier.start()
 
         self.input_defaults = Box(scale=None, crop=None)
         self.initial_duration = 0
+        self.preview_time = 0
+        self.preview_filters = ""
+        self.keyframe_index = {}
+        self.scene_index = {}
+        self.settings_sections = SettingsSections()
+        # Encoder, settings and the commands they last built, kept until a setting changes
+        self.built_commands = None
 
         for path in self.path.values():
             path.mkdir(parents=True, exist_ok=True)
@@ -92,22 +91,27 @@ class Main(QtWidgets.QWidget):
         self.widgets = Box(
             input_file=None,
             preview=None,
+            preview_position=None,
+            filmstrip=None,
             start_time=None,
             end_time=None,
             video_track=None,
             convert_to=None,
             rotate=None,
             convert_button=None,
+            cancel_button=None,
             v_flip=None,
             h_flip=None,
-            crop=Box(top=None, bottom=None, left=None, right=None),
+            crop=Box(top=None, bottom=None, left=None, right=None, auto=None),
             scale=Box(width=None, height=None, keep_aspect_ratio=None),
             remove_metadata=None,
             chapters=None,
             fast_time=None,
+            scene_keyframes=None,
         )
 
-        self.thumb_file = Path(self.path.work, "thumbnail_preview.png")
+        self.thumbnail_scheduler = ThumbnailScheduler(self)
+        self.filmstrip_generator = FilmstripGenerator(self)
         self.flix = flix
         self.plugins = load_plugins(self.flix.config)
 
@@ -115,13 +119,24 @@ class Main(QtWidgets.QWidget):
             self, available_audio_encoders=self.flix.get_audio_encoders(), log_queue=log_queue
         )
 
-        self.completed.connect(self.conversion_complete)
+        self.job_added.connect(self.job_queued)
+        self.job_finished.connect(self.conversion_complete)
         self.cancelled.connect(self.conversion_cancelled)
         self.close_event.connect(self.close)
-        self.thumbnail_complete.connect(self.thumbnail_generated)
+        self.thumbnail_scheduler.thumbnail_ready.connect(self.thumbnail_generated)
+        self.filmstrip_generator.filmstrip_ready.connect(self.filmstrip_generated)
+        self.keyframes_ready.connect(self.keyframes_loaded)
+        self.scene_cuts_ready.connect(self.scene_cuts_loaded)
+        self.crop_detected.connect(self.auto_crop_complete)
+        self.encode_progress.connect(self.video_options.status.update_progress)
+        self.unfinished_jobs.connect(self.offer_unfinished_jobs)
+        self.crop_detector = None
         self.encoding_worker = None
         self.command_runner = None
-        self.converting = False
+        # Queued or running jobs by their id, with the output they write when this GUI started them
+        self.jobs = {}
+        # Outputs of jobs handed to the core that it has not given an id yet, by the token sent along
+        self.job_requests = {}
         self.side_data = Box()
 
         self.video_width = 0
@@ -136,14 +151,16 @@ class Main(QtWidgets.QWidget):
         self.init_video_area()
         self.init_scale_and_crop()
         self.init_preview_image()
+        self.init_filmstrip()
 
-        self.grid.addWidget(self.video_options, 5, 0, 10, 14)
+        self.grid.addWidget(self.video_options, 6, 0, 10, 14)
         self.grid.setSpacing(5)
 
         self.setLayout(self.grid)
         self.show()
         self.initialized = True
         self.last_page_update = time.time()
+        self.notifier.start()
 
     def init_video_area(self):
         layout = QtWidgets.QVBoxLayout()
@@ -179,8 +196,16 @@ class Main(QtWidgets.QWidget):
         self.widgets.chapters.toggled.connect(self.page_update)
         self.widgets.chapters.setToolTip("Copy the chapter markers as is from incoming source.")
 
+        self.widgets.scene_keyframes = QtWidgets.QCheckBox("Keyframes at Scene Cuts")
+        self.widgets.scene_keyframes.setChecked(False)
+        self.widgets.scene_keyframes.toggled.connect(lambda: self.page_update(build_thumbnail=False))
+        self.widgets.scene_keyframes.setToolTip(
+            "Force a keyframe at every scene cut found in the source, once the scene analysis is done"
+        )
+
         metadata_layout.addWidget(self.widgets.remove_metadata)
         metadata_layout.addWidget(self.widgets.chapters)
+        metadata_layout.addWidget(self.widgets.scene_keyframes)
 
         transform_layout.addLayout(metadata_layout)
 
@@ -210,10 +235,17 @@ class Main(QtWidgets.QWidget):
         convert.setDisabled(True)
         self.widgets.convert_button = convert
         self.widgets.convert_button.setStyleSheet("background-color:grey;")
+        cancel = QtWidgets.QPushButton("⛔ Cancel")
+        cancel.setFixedSize(100, 50)
+        cancel.setToolTip("Cancel every queued and running job")
+        cancel.clicked.connect(lambda: self.worker_queue.put(["cancel"]))
+        cancel.setDisabled(True)
+        self.widgets.cancel_button = cancel
         layout.addWidget(open_input_file)
         layout.addStretch()
         layout.addLayout(self.init_output_type())
         layout.addStretch()
+        layout.addWidget(cancel)
         layout.addWidget(convert)
         return layout
 
@@ -236,7 +268,7 @@ class Main(QtWidgets.QWidget):
         layout = QtWidgets.QHBoxLayout()
         self.widgets.video_track = QtWidgets.QComboBox()
         self.widgets.video_track.addItems([])
-        self.widgets.video_track.currentIndexChanged.connect(lambda: self.page_update())
+        self.widgets.video_track.currentIndexChanged.connect(lambda: [self.load_keyframes(), self.page_update()])
         layout.addWidget(QtWidgets.QLabel("Video Track "), stretch=0)
         layout.addWidget(self.widgets.video_track, stretch=1)
         layout.setSpacing(10)
@@ -245,16 +277,10 @@ class Main(QtWidgets.QWidget):
     def init_flip(self):
         self.flip_combo_box = QtWidgets.QComboBox()
 
-        no_rot_file = str(Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix.png")).resolve())
-        vert_flip_file = str(
-            Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix VF.png")).resolve()
-        )
-        hoz_flip_file = str(
-            Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix HF.png")).resolve()
-        )
-        rot_180_file = str(
-            Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix 180.png")).resolve()
-        )
+        no_rot_file = str(rotation_dir / "FastFlix.png")
+        vert_flip_file = str(rotation_dir / "FastFlix VF.png")
+        hoz_flip_file = str(rotation_dir / "FastFlix HF.png")
+        rot_180_file = str(rotation_dir / "FastFlix 180.png")
 
         self.flip_combo_box.addItems(["No Flip", "Vertical Flip", "Horizontal Flip", "Vert + Hoz Flip"])
         self.flip_combo_box.setItemIcon(0, QtGui.QIcon(no_rot_file))
@@ -272,16 +298,10 @@ class Main(QtWidgets.QWidget):
     def init_rotate(self):
         self.rotate_combo_box = QtWidgets.QComboBox()
 
-        no_rot_file = str(Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix.png")).resolve())
-        rot_90_file = str(
-            Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix C90.png")).resolve()
-        )
-        rot_270_file = str(
-            Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix CC90.png")).resolve()
-        )
-        rot_180_file = str(
-            Path(pkg_resources.resource_filename(__name__, f"../data/rotations/FastFlix 180.png")).resolve()
-        )
+        no_rot_file = str(rotation_dir / "FastFlix.png")
+        rot_90_file = str(rotation_dir / "FastFlix C90.png")
+        rot_270_file = str(rotation_dir / "FastFlix CC90.png")
+        rot_180_file = str(rotation_dir / "FastFlix 180.png")
 
         self.rotate_combo_box.addItems(["No Rotation", "90°", "180°", "270°"])
         self.rotate_combo_box.setItemIcon(0, QtGui.QIcon(no_rot_file))
@@ -325,7 +345,7 @@ class Main(QtWidgets.QWidget):
         self.widgets.end_time, layout = self.build_hoz_int_field(
             "  End  ", left_stretch=False, right_stretch=True, layout=layout, time_field=True
         )
-        self.widgets.start_time.textChanged.connect(lambda: self.page_update())
+        self.widgets.start_time.textChanged.connect(lambda: [self.sync_preview_position(), self.page_update()])
         self.widgets.end_time.textChanged.connect(lambda: self.page_update())
         self.widgets.fast_time = QtWidgets.QComboBox()
         self.widgets.fast_time.addItems(["fast", "exact"])
@@ -397,6 +417,12 @@ class Main(QtWidgets.QWidget):
         self.widgets.crop.right.textChanged.connect(lambda: self.page_update())
         self.widgets.crop.bottom.textChanged.connect(lambda: self.page_update())
 
+        self.widgets.crop.auto = QtWidgets.QPushButton("Auto")
+        self.widgets.crop.auto.setFixedHeight(22)
+        self.widgets.crop.auto.setToolTip("Detect black bars by sampling frames across the whole video")
+        self.widgets.crop.auto.clicked.connect(lambda: self.auto_crop())
+        crop_bottom_layout.addWidget(self.widgets.crop.auto)
+
         label = QtWidgets.QLabel("Crop", alignment=(QtCore.Qt.AlignBottom | QtCore.Qt.AlignRight))
         label.setStyleSheet("QLabel{color:#777}")
         label.setMaximumHeight(40)
@@ -479,7 +505,28 @@ class Main(QtWidgets.QWidget):
 
         # buttons = self.init_preview_buttons()
 
-        self.grid.addWidget(self.widgets.preview, 0, 10, 5, 4, (QtCore.Qt.AlignTop | QtCore.Qt.AlignRight))
+        self.widgets.preview_position = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        self.widgets.preview_position.setFixedWidth(320)
+        self.widgets.preview_position.setDisabled(True)
+        self.widgets.preview_position.setToolTip("Drag to scrub through the source, the start time is not changed")
+        self.widgets.preview_position.sliderMoved.connect(self.scrub_preview)
+        self.widgets.preview_position.sliderReleased.connect(lambda: self.request_preview())
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.widgets.preview)
+        layout.addWidget(self.widgets.preview_position)
+        layout.addStretch()
+        self.grid.addLayout(layout, 0, 10, 5, 4, (QtCore.Qt.AlignTop | QtCore.Qt.AlignRight))
+
+    def init_filmstrip(self):
+        self.widgets.filmstrip = Filmstrip(self)
+        self.widgets.filmstrip.start_selected.connect(
+            lambda seconds: self.widgets.start_time.setText(self.number_to_time(seconds))
+        )
+        self.widgets.filmstrip.end_selected.connect(
+            lambda seconds: self.widgets.end_time.setText(self.number_to_time(seconds))
+        )
+        self.grid.addWidget(self.widgets.filmstrip, 5, 0, 1, 14)
 
     def init_preview_buttons(self):
         layout = QtWidgets.QVBoxLayout()
@@ -576,6 +623,32 @@ class Main(QtWidgets.QWidget):
             return
         return f"{width}:{height}:{left}:{top}"
 
+    def auto_crop(self):
+        if not self.input_video or self.loading_video or (self.crop_detector and self.crop_detector.isRunning()):
+            return
+        self.widgets.crop.auto.setDisabled(True)
+        self.widgets.crop.auto.setText("...")
+        self.crop_detector = CropDetector(
+            self,
+            source=self.input_video,
+            video_track=self.original_video_track,
+            duration=self.initial_duration,
+            width=self.video_width,
+            height=self.video_height,
+        )
+        self.crop_detector.start()
+
+    def auto_crop_complete(self, crop):
+        self.widgets.crop.auto.setDisabled(False)
+        self.widgets.crop.auto.setText("Auto")
+        if not crop:
+            error_message("Could not detect black bars for this video")
+            return
+        logger.info(f"Auto crop detected {crop.to_dict()}")
+        for side in ("top", "left", "right", "bottom"):
+            self.widgets.crop[side].setText(str(crop[side]))
+        self.page_update()
+
     @reusables.log_exception("fastflix", show_traceback=False)
     def scale_update(self):
         if self.scale_updating:
@@ -649,9 +722,14 @@ class Main(QtWidgets.QWidget):
     @reusables.log_exception("fastflix", show_traceback=False)
     def update_video_info(self):
         self.loading_video = True
+        self.filmstrip_generator.cancel()
+        self.flix.cancel_scans(keep=self.input_video)
+        self.widgets.filmstrip.clear()
+        self.keyframe_index = {}
+        self.scene_index = {}
         try:
-            self.streams, self.format_info = self.flix.parse(
-                self.input_video, work_dir=self.path.work, extract_covers=True
+            self.streams, self.format_info, self.side_data = self.flix.parse_combined(
+                self.input_video, work_dir=self.path.work
             )
         except FlixError:
             error_message(f"Not a video file<br>{self.input_video}")
@@ -664,13 +742,11 @@ class Main(QtWidgets.QWidget):
             self.format_info = None
             for i in range(self.widgets.video_track.count()):
                 self.widgets.video_track.removeItem(0)
-            self.widgets.convert_button.setDisabled(True)
-            self.widgets.convert_button.setStyleSheet("background-color:gray;")
+            self.update_convert_button()
             self.widgets.preview.setText("No Video File")
             self.page_update()
             return
 
-        self.side_data = self.flix.parse_hdr_details(self.input_video)
         logger.debug(self.streams)
         logger.debug(self.format_info)
 
@@ -691,8 +767,7 @@ class Main(QtWidgets.QWidget):
             self.output_video_path_widget.setDisabled(True)
             self.streams = None
             self.format_info = None
-            self.widgets.convert_button.setDisabled(True)
-            self.widgets.convert_button.setStyleSheet("background-color:gray;")
+            self.update_convert_button()
             self.widgets.preview.setText("No Video File")
             self.page_update()
             return
@@ -738,11 +813,112 @@ class Main(QtWidgets.QWidget):
             logger.debug(f"{len(self.streams['data'])} data tracks found")
 
         self.widgets.end_time.setText(self.number_to_time(video_duration))
+        self.widgets.preview_position.setRange(0, int(video_duration))
+        self.widgets.preview_position.setDisabled(False)
+        self.thumbnail_scheduler.new_source()
+        self.sync_preview_position()
 
         self.video_options.new_source()
-        self.widgets.convert_button.setDisabled(False)
-        self.widgets.convert_button.setStyleSheet("background-color:green;")
+        self.update_convert_button()
         self.loading_video = False
+        self.load_keyframes()
+        self.load_filmstrip()
+        self.load_scene_cuts()
+
+    @property
+    def keyframes(self):
+        if self.input_video and self.streams:
+            return self.keyframe_index.get((self.input_video, self.original_video_track))
+
+    def load_keyframes(self):
+        """Build the keyframe index of the current video track in the background, once per source and track"""
+        if self.loading_video or not self.input_video or not self.streams:
+            return
+        key = (self.input_video, self.original_video_track)
+        if key in self.keyframe_index:
+            return
+        self.keyframe_index[key] = None
+        self.flix.scan_pool.apply_async(
+            self.flix.get_keyframes,
+            key,
+            dict(background=True),
+            callback=lambda keyframes: self.keyframes_ready.emit(key, keyframes),
+            error_callback=lambda error: logger.warning(f"Could not build keyframe index: {error}"),
+        )
+
+    def keyframes_loaded(self, key, keyframes):
+        if key not in self.keyframe_index:
+            return
+        logger.debug(f"{len(keyframes)} keyframes found for video track {key[1]}")
+        self.keyframe_index[key] = keyframes
+        if key == (self.input_video, self.original_video_track):
+            self.page_update(build_thumbnail=False)
+
+    @property
+    def scene_cuts(self):
+        if self.input_video and self.streams:
+            return self.scene_index.get((self.input_video, self.original_video_track))
+
+    @property
+    def scene_cuts_wanted(self):
+        """Finding scene cuts decodes the whole source, so it is only done for the options that use them"""
+        chunked = self.video_options.current_settings.widgets.get("chunked")
+        return self.scene_keyframes or bool(chunked and chunked.isChecked())
+
+    def load_scene_cuts(self):
+        """
+        Find the scene cuts of the current video track in the background, once per source and track,
+        as soon as keyframes at scene cuts or a chunked encode are chosen
+        """
+        if self.loading_video or not self.input_video or not self.streams:
+            return
+        key = (self.input_video, self.original_video_track)
+        if key in self.scene_index:
+            self.widgets.filmstrip.set_scene_cuts(self.scene_index[key])
+            return
+        self.widgets.filmstrip.set_scene_cuts(None)
+        if not self.scene_cuts_wanted:
+            return
+        self.scene_index[key] = None
+        self.flix.scan_pool.apply_async(
+            self.flix.get_scene_cuts,
+            key,
+            dict(background=True),
+            callback=lambda scene_cuts: self.scene_cuts_ready.emit(key, scene_cuts),
+            error_callback=lambda error: logger.warning(f"Could not find scene cuts: {error}"),
+        )
+
+    def scene_cuts_loaded(self, key, scene_cuts):
+        if key not in self.scene_index:
+            return
+        logger.debug(f"{len(scene_cuts)} scene cuts found in video track {key[1]}")
+        self.scene_index[key] = scene_cuts
+        if key == (self.input_video, self.original_video_track):
+            self.widgets.filmstrip.set_scene_cuts(scene_cuts)
+            self.page_update(build_thumbnail=False)
+
+    def load_filmstrip(self, count=10):
+        video_track = self.streams.video[0].index
+        key = (self.input_video, video_track, count, self.initial_duration)
+        image_data = self.flix.get_filmstrip(self.input_video, video_track, count)
+        if image_data:
+            logger.debug(f"Using cached filmstrip for {self.input_video}")
+            self.filmstrip_generated(key, QtGui.QImage.fromData(image_data), save=False)
+            return
+        command = self.flix.generate_filmstrip_command(self.input_video, video_track, self.initial_duration, count)
+        self.filmstrip_generator.request(key, command)
+
+    def filmstrip_generated(self, key, image, save=True):
+        source, video_track, count, duration = key
+        if source != self.input_video or image.isNull():
+            return
+        if save:
+            buffer = QtCore.QBuffer()
+            buffer.open(QtCore.QIODevice.WriteOnly)
+            image.save(buffer, "PNG")
+            self.flix.save_filmstrip(source, video_track, count, bytes(buffer.data()))
+        self.widgets.filmstrip.set_filmstrip(image, duration)
+        self.widgets.filmstrip.set_selection(self.start_time, self.end_time)
 
     @property
     def video_track(self):
@@ -780,6 +956,10 @@ class Main(QtWidgets.QWidget):
     def copy_chapters(self):
         return self.widgets.chapters.isChecked()
 
+    @property
+    def scene_keyframes(self):
+        return self.widgets.scene_keyframes.isChecked()
+
     @staticmethod
     def time_to_number(string_time):
         try:
@@ -811,29 +991,51 @@ class Main(QtWidgets.QWidget):
 
         if settings.pix_fmt == "yuv420p10le" and self.pix_fmt in ("yuv420p10le", "yuv420p12le"):
             settings.disable_hdr = True
-        filters = helpers.generate_filters(**settings)
+        self.preview_filters = helpers.generate_filters(**settings)
+        self.request_preview()
 
+    def request_preview(self, scrub=False):
+        if not self.input_video or self.loading_video:
+            return
+        video_track = self.streams["video"][self.video_track]["index"]
+        keyframes = self.keyframes
+        start_time = self.preview_time
+        if scrub and keyframes:
+            # Scrubbing only shows keyframes, snapping to them lets nearby slider positions share a cached frame
+            start_time = previous_keyframe(keyframes, start_time)
         thumb_command = self.flix.generate_thumbnail_command(
             source=self.input_video,
-            output=self.thumb_file,
-            video_track=self.streams["video"][self.video_track]["index"],
-            filters=filters,
-            start_time=settings.start_time,
+            output=None,
+            video_track=video_track,
+            filters=self.preview_filters,
+            start_time=start_time,
+            fast_seek=scrub,
+            keyframes=keyframes,
+        )
+        self.thumbnail_scheduler.request(
+            (self.input_video, video_track, start_time, self.preview_filters, scrub), thumb_command, scrub=scrub
         )
-        try:
-            self.thumb_file.unlink()
-        except OSError:
-            pass
-        worker = ThumbnailCreator(self, thumb_command)
-        worker.start()
+
+    def scrub_preview(self, position):
+        self.preview_time = position
+        self.request_preview(scrub=True)
+
+    def sync_preview_position(self):
+        start_time = self.start_time
+        if start_time is None:
+            return
+        self.preview_time = start_time
+        self.widgets.preview_position.blockSignals(True)
+        self.widgets.preview_position.setValue(int(start_time))
+        self.widgets.preview_position.blockSignals(False)
 
     @reusables.log_exception("fastflix", show_traceback=False)
-    def thumbnail_generated(self, success=False):
-        if not success or not self.thumb_file.exists():
+    def thumbnail_generated(self, success, image):
+        if not success:
             self.widgets.preview.setText("Error Updating Thumbnail")
             return
 
-        pixmap = QtGui.QPixmap(str(self.thumb_file))
+        pixmap = QtGui.QPixmap.fromImage(image)
         pixmap = pixmap.scaled(320, 213, QtCore.Qt.KeepAspectRatio)
         self.widgets.preview.setPixmap(pixmap)
 
@@ -842,9 +1044,7 @@ class Main(QtWidgets.QWidget):
         height = self.widgets.scale.height.text()
         return f"{width}:{height}"
 
-    def get_all_settings(self):
-        if not self.initialized:
-            return
+    def get_settings_sections(self):
         stream_info = self.streams.video[self.video_track]
 
         end_time = self.end_time
@@ -862,18 +1062,14 @@ class Main(QtWidgets.QWidget):
             scale = None
 
         v_flip, h_flip = self.get_flips()
-        settings = Box(
-            crop=self.build_crop(),
-            scale=scale,
+        sections = self.video_options.get_sections()
+        video = dict(
             source=self.input_video,
             start_time=self.start_time,
             end_time=end_time,
             video_track=self.original_video_track,
             stream_track=self.video_track,
             pix_fmt=self.pix_fmt,
-            rotate=self.rotation_to_transpose(),
-            v_flip=v_flip,
-            h_flip=h_flip,
             streams=self.streams,
             format_info=self.format_info,
             work_dir=self.path.work,
@@ -885,26 +1081,63 @@ class Main(QtWidgets.QWidget):
             remove_metadata=self.remove_metadata,
             copy_chapters=self.copy_chapters,
             fast_time=self.fast_time,
+            keyframes=self.keyframes,
+            scene_cuts=self.scene_cuts,
+            force_scene_keyframes=self.scene_keyframes,
+        )
+        # The encoder's own settings, like its pix_fmt, take priority
+        video.update(sections["video"])
+        sections["video"] = video
+        sections["filters"] = dict(
+            crop=self.build_crop(),
+            scale=scale,
+            rotate=self.rotation_to_transpose(),
+            v_flip=v_flip,
+            h_flip=h_flip,
         )
-        settings.update(**self.video_options.get_settings())
-        logger.debug(f"Settings gathered: {settings.to_dict()}")
-        return settings
+        return sections
+
+    def update_settings_sections(self):
+        """Gather every section of the settings again, returning and logging only what changed"""
+        changed = self.settings_sections.update(self.get_settings_sections())
+        if changed:
+            logger.debug(f"Settings changed: {self.settings_sections.loggable(changed)}")
+        return changed
 
-    def build_commands(self):
+    def get_all_settings(self):
+        if not self.initialized:
+            return
+        self.update_settings_sections()
+        return self.settings_sections.settings()
+
+    def build_commands(self, force=False):
+        """
+        Build the commands again only if a setting or the encoder changed since they were last built.
+        Returns the settings, the commands, and which sections of the settings changed.
+        """
         if not self.initialized or not self.streams or self.loading_video:
             return
-        settings = self.get_all_settings()
-        commands = self.plugins[self.convert_to].build(**settings)
-        self.video_options.commands.update_commands(commands)
-        return settings, commands
+        changed = self.update_settings_sections()
+        if force or changed or self.built_commands is None or self.built_commands[0] != self.convert_to:
+            settings = self.settings_sections.settings()
+            commands = self.plugins[self.convert_to].build(**settings)
+            self.built_commands = (self.convert_to, settings, commands)
+            self.video_options.commands.update_commands(commands)
+        _, settings, commands = self.built_commands
+        return settings, commands, changed
 
     def page_update(self, build_thumbnail=True):
         if not self.initialized or self.loading_video:
             return
         self.last_page_update = time.time()
+        self.widgets.filmstrip.set_selection(self.start_time, self.end_time)
+        self.load_scene_cuts()
         self.video_options.refresh()
-        settings, _ = self.build_commands()
-        if build_thumbnail:
+        built = self.build_commands()
+        if not built:
+            return
+        settings, _, changed = built
+        if build_thumbnail and ("video" in changed or "filters" in changed):
             self.generate_thumbnail(settings)
 
     def close(self, no_cleanup=False):
@@ -929,21 +1162,16 @@ class Main(QtWidgets.QWidget):
 
     @reusables.log_exception("fastflix", show_traceback=False)
     def create_video(self):
-        if self.converting:
-            self.worker_queue.put(["cancel"])
-            return
-
         if not self.input_video:
             return error_message("Have to select a video first")
 
-        if self.encoding_worker and self.encoding_worker.is_alive():
-            return error_message("Still encoding something else")
-
         if not self.input_video:
             return error_message("Please provide a source video")
         if not self.output_video:
             error_message("Please specify output video")
             return
+        if self.output_video in [job.output for job in self.jobs.values()] + list(self.job_requests.values()):
+            return error_message("A queued job already writes to that output, please choose another")
         if not self.output_video.lower().endswith(self.current_plugin.video_extension):
             sm = QtWidgets.QMessageBox()
             sm.setText(
@@ -965,23 +1193,69 @@ class Main(QtWidgets.QWidget):
             elif not sm.clickedButton().text().startswith("Continue"):
                 return
 
-        _, commands = self.build_commands()
+        # Always built anew, so every encode gets its own pass log files
+        _, commands, _ = self.build_commands(force=True)
+        duration = (self.end_time or self.initial_duration) - (self.start_time or 0)
+
+        token = secrets.token_hex(8)
+        self.job_requests[token] = self.output_video
+        self.update_convert_button()
+        job = (
+            "job",
+            dict(
+                commands=[
+                    [chunk.command for chunk in command.commands] if command.item == "parallel" else command.command
+                    for command in commands
+                ],
+                work_dir=self.path.temp_dir,
+                duration=duration,
+                name=Path(self.output_video).name,
+                files={path: text for command in commands for path, text in getattr(command, "files", {}).items()},
+                token=token,
+            ),
+        )
+
+        def queue_job():
+            # Unless everything was cancelled while it waited
+            if token in self.job_requests:
+                self.worker_queue.put(job)
 
-        self.widgets.convert_button.setText("⛔ Cancel")
-        self.widgets.convert_button.setStyleSheet("background-color:red;")
-        self.converting = True
-        for command in commands:
-            self.worker_queue.put(("command", command.command, self.path.temp_dir))
+        if getattr(self.current_plugin, "enable_attachments", False):
+            # The commands copy the extracted covers, so the job is handed over once they are written
+            self.video_options.attachments.extract_covers(then=queue_job)
+        else:
+            queue_job()
         self.video_options.setCurrentWidget(self.video_options.status)
 
+    @property
+    def converting(self):
+        """Whether any job is queued or running, including the ones resumed from the last run"""
+        return bool(self.jobs or self.job_requests)
+
+    def update_convert_button(self):
+        """More jobs can be queued while others run, cancelling stops every one of them"""
+        self.widgets.convert_button.setDisabled(not self.streams)
+        self.widgets.convert_button.setText("Add to Queue" if self.converting else "Convert 🎥")
+        self.widgets.convert_button.setStyleSheet(f"background-color:{'green' if self.streams else 'gray'};")
+        self.widgets.cancel_button.setDisabled(not self.converting)
+        self.widgets.cancel_button.setStyleSheet(f"background-color:{'red' if self.converting else 'gray'};")
+
+    def job_queued(self, job_id, name, token):
+        self.jobs[job_id] = Box(name=name, output=self.job_requests.pop(token, None))
+        self.video_options.status.add_job(job_id, name)
+        self.update_convert_button()
+
     @reusables.log_exception("fastflix", show_traceback=False)
-    def conversion_complete(self, return_code):
-        self.widgets.convert_button.setStyleSheet("background-color:green;")
-        self.converting = False
-        self.widgets.convert_button.setText("Convert 🎥")
-        output = Path(self.output_video)
+    def conversion_complete(self, job_id, status):
+        job = self.jobs.pop(job_id, None)
+        self.video_options.status.remove_job(job_id)
+        self.update_convert_button()
+        if not job or not job.output:
+            # Resumed from the last run, the log already tells how it ended
+            return
+        output = Path(job.output)
 
-        if return_code or not output.exists() or output.stat().st_size <= 500:
+        if status != "complete" or not output.exists() or output.stat().st_size <= 500:
             error_message("Could not encode video due to an error, please view the logs for more details!")
         else:
             sm = QtWidgets.QMessageBox()
@@ -990,17 +1264,35 @@ class Main(QtWidgets.QWidget):
             sm.setStandardButtons(QtWidgets.QMessageBox.Close)
             sm.exec_()
             if sm.clickedButton().text() == "View":
-                QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(self.output_video))
+                QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(job.output))
+
+    def offer_unfinished_jobs(self, names):
+        sm = QtWidgets.QMessageBox()
+        sm.setText(
+            f"<h2>{len(names)} encoding job(s) did not finish last time</h2>"
+            + "<br>".join(names)
+            + "<br><br>Resume them now? Steps that already finished will be skipped."
+        )
+        sm.addButton("Resume", QtWidgets.QMessageBox.YesRole)
+        sm.addButton("Discard", QtWidgets.QMessageBox.NoRole)
+        sm.exec_()
+        if sm.clickedButton().text() == "Resume":
+            self.worker_queue.put(["resume_jobs"])
+            self.video_options.setCurrentWidget(self.video_options.status)
+        else:
+            self.worker_queue.put(["discard_jobs"])
 
     @reusables.log_exception("fastflix", show_traceback=False)
     def conversion_cancelled(self):
-        self.widgets.convert_button.setStyleSheet("background-color:green;")
-        self.converting = False
-        self.widgets.convert_button.setText("Convert 🎥")
-        try:
-            os.remove(self.output_video)
-        except OSError:
-            pass
+        outputs = [job.output for job in self.jobs.values() if job.output] + list(self.job_requests.values())
+        self.jobs, self.job_requests = {}, {}
+        self.video_options.status.clear_jobs()
+        self.update_convert_button()
+        for output in outputs:
+            try:
+                os.remove(output)
+            except OSError:
+                pass
 
     @reusables.log_exception("fastflix", show_traceback=False)
     def dropEvent(self, event):
@@ -1024,6 +1316,21 @@ class Main(QtWidgets.QWidget):
         event.accept() if event.mimeData().hasUrls else event.ignore()
 
 
+class CropDetector(QtCore.QThread):
+    def __init__(self, parent, **detect_settings):
+        super().__init__(parent)
+        self.app = parent
+        self.detect_settings = detect_settings
+
+    def run(self):
+        try:
+            crop = self.app.flix.detect_crop(**self.detect_settings)
+        except Exception as err:
+            logger.warning(f"Auto crop failed: {err}")
+            crop = None
+        self.app.crop_detected.emit(crop)
+
+
 class Notifier(QtCore.QThread):
     def __init__(self, parent, status_queue):
         super().__init__(parent)
@@ -1036,8 +1343,14 @@ class Notifier(QtCore.QThread):
     def run(self):
         while True:
             status = self.status_queue.get()
-            if status == "complete":
-                self.app.completed.emit(0)
+            if isinstance(status, (tuple, list)) and status[0] == "progress":
+                self.app.encode_progress.emit(status[1])
+            elif isinstance(status, (tuple, list)) and status[0] == "unfinished_jobs":
+                self.app.unfinished_jobs.emit(status[1])
+            elif isinstance(status, (tuple, list)) and status[0] == "job_added":
+                self.app.job_added.emit(*status[1:])
+            elif isinstance(status, (tuple, list)) and status[0] == "job_finished":
+                self.app.job_finished.emit(*status[1:])
             elif status == "cancelled":
                 self.app.cancelled.emit()
             elif status == "exit":
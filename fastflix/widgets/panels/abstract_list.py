@@ -99,5 +99,16 @@ class FlixList(QtWidgets.QWidget):
         return len([x for x in self.tracks if x.enabled])
 
     def refresh(self, starting_pos=0):
+        """Renumber the tracks, only laying them out again if an output index is out of date"""
+        disabled = 0
+        current = starting_pos == self.starting_pos
+        for index, widget in enumerate(self.tracks, starting_pos):
+            if not widget.enabled:
+                disabled += 1
+            elif widget.outdex != index - disabled:
+                current = False
+                break
+        if current:
+            return
         self.starting_pos = starting_pos
         self.reorder(update=False)
@@ -16,8 +16,26 @@ class Loop(QtWidgets.QGroupBox):
         self.number = number
         self.setStyleSheet("QGroupBox{padding-top:15px; margin-top:-18px}")
 
+        self.items = []
         for index, item in enumerate(commands, 1):
             new_item = Command(parent, item.command, index, item.name)
+            self.items.append(new_item)
+            layout.addWidget(new_item)
+        self.setLayout(layout)
+
+
+class ParallelGroup(QtWidgets.QGroupBox):
+    def __init__(self, parent, commands, number, name=""):
+        super(ParallelGroup, self).__init__(parent)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(QtWidgets.QLabel(f"Run together: {name}"))
+        self.number = number
+        self.setStyleSheet("QGroupBox{padding-top:15px; margin-top:-18px}")
+
+        self.items = []
+        for index, item in enumerate(commands, 1):
+            new_item = Command(parent, item.command, index, item.name)
+            self.items.append(new_item)
             layout.addWidget(new_item)
         self.setLayout(layout)
 
@@ -30,15 +48,25 @@ class Command(QtWidgets.QTabWidget):
         self.widget.setReadOnly(True)
         self.widget.setText(command)
         self.widget.setDisabled(not enabled)
-        font_height = QtGui.QFontMetrics(self.widget.document().defaultFont()).height()
-        lines = math.ceil(len(command) / 200)
-        self.setMinimumHeight(int(font_height + ((lines + 2) * (font_height * 1.25))))
+        self.fit_height()
 
         grid = QtWidgets.QGridLayout()
         grid.addWidget(QtWidgets.QLabel(f"Command {number}" if not name else name), 0, 0, 1, 2)
         grid.addWidget(self.widget, 1, 0, 1, 2)
         self.setLayout(grid)
 
+    def fit_height(self):
+        font_height = QtGui.QFontMetrics(self.widget.document().defaultFont()).height()
+        lines = math.ceil(len(self.command) / 200)
+        self.setMinimumHeight(int(font_height + ((lines + 2) * (font_height * 1.25))))
+
+    def set_command(self, command):
+        if command == self.command:
+            return
+        self.command = command
+        self.widget.setText(command)
+        self.fit_height()
+
 
 class CommandList(QtWidgets.QWidget):
     def __init__(self, parent):
@@ -75,6 +103,9 @@ class CommandList(QtWidgets.QWidget):
 
         layout.addWidget(self.scroll_area)
         self.commands = []
+        # Kind, name and size of each step shown, and the Command widgets of every command in them, in order
+        self.shape = None
+        self.command_widgets = []
         self.setLayout(layout)
 
     def _prep_commands(self):
@@ -93,9 +124,26 @@ class CommandList(QtWidgets.QWidget):
         if filename and filename[0]:
             Path(filename[0]).write_text(self._prep_commands())
 
+    @staticmethod
+    def step_commands(item):
+        return [item.command] if item.item == "command" else [command.command for command in item.commands]
+
     def update_commands(self, commands):
+        """Show new commands, only changing the text of the ones that differ when the steps stay the same"""
         if not commands:
             return
+        shape = [(item.item, item.name, len(getattr(item, "commands", ()))) for item in commands]
+        if shape == self.shape:
+            texts = [command for item in commands for command in self.step_commands(item)]
+            for widget, command in zip(self.command_widgets, texts):
+                widget.set_command(command)
+            # Loop commands are shown but, as always, not copied or saved
+            self.commands = [
+                command for item in commands if item.item != "loop" for command in self.step_commands(item)
+            ]
+            return
+        self.shape = shape
+        self.command_widgets = []
         self.inner_widget = QtWidgets.QWidget()
         sp = QtWidgets.QSizePolicy()
         sp.setHorizontalPolicy(QtWidgets.QSizePolicy.Policy.Maximum)
@@ -107,9 +155,16 @@ class CommandList(QtWidgets.QWidget):
             if item.item == "command":
                 new_item = Command(self.scroll_area, item.command, index, name=item.name)
                 self.commands.append(item.command)
+                self.command_widgets.append(new_item)
                 layout.addWidget(new_item)
             elif item.item == "loop":
                 new_item = Loop(self.scroll_area, item.condition, item.commands, index, name=item.name)
+                self.command_widgets.extend(new_item.items)
+                layout.addWidget(new_item)
+            elif item.item == "parallel":
+                new_item = ParallelGroup(self.scroll_area, item.commands, index, name=item.name)
+                self.commands.extend(command.command for command in item.commands)
+                self.command_widgets.extend(new_item.items)
                 layout.addWidget(new_item)
         layout.addStretch()
         self.inner_widget.setLayout(layout)
@@ -12,10 +12,19 @@ logger = logging.getLogger("fastflix")
 
 
 class CoverPanel(QtWidgets.QWidget):
+    covers_ready = QtCore.Signal(int, object)
+
     def __init__(self, parent):
         super().__init__(parent)
         self.main = parent.main
         self.attachments = Box()
+        self.covers_extracted = False
+        self.extraction = None
+        # Functions to call once the covers of a source are extracted, by the count of that source
+        self.waiting = {}
+        # Counts the sources loaded, so an extraction that finishes after the next source is opened is ignored
+        self.source_count = 0
+        self.covers_ready.connect(self.covers_loaded)
 
         layout = QtWidgets.QGridLayout()
 
@@ -208,14 +217,61 @@ class CoverPanel(QtWidgets.QWidget):
             attachments_track_count=track_index - out_stream_start_index,
         )
 
+    def extract_covers(self, then=None):
+        """
+        Pull the source's cover attachments into the work directory on the thread pool the first time they are
+        needed, the previews are shown once covers_ready is emitted.
+        then is called on the GUI thread once the files are written, such as to queue an encode that copies them.
+        """
+        if self.covers_extracted or not self.attachments or not self.main.input_video:
+            if then:
+                then()
+            return
+        if then:
+            self.waiting.setdefault(self.source_count, []).append(then)
+        if self.extraction is not None:
+            return
+        source_count = self.source_count
+        self.extraction = self.main.flix.tp.apply_async(
+            self.main.flix.extract_attachments,
+            (
+                self.main.input_video,
+                [(attachment.stream, attachment.name) for attachment in self.attachments.values()],
+            ),
+            dict(work_dir=self.main.path.work),
+            callback=lambda _: self.covers_ready.emit(source_count, None),
+            error_callback=lambda error: self.covers_ready.emit(source_count, error),
+        )
+
+    def covers_loaded(self, source_count, error):
+        if error:
+            logger.warning(f"Could not extract the covers: {error}")
+        # Jobs of an earlier source still wait for its covers, even once another source is open
+        for then in self.waiting.pop(source_count, []):
+            then()
+        if source_count != self.source_count:
+            return
+        self.extraction = None
+        if error:
+            return
+        self.covers_extracted = True
+        if "cover" in self.attachments and self.cover_passthrough_checkbox.isChecked():
+            self.poster.setPixmap(self.attachment_pixmap("cover"))
+        if "cover_land" in self.attachments and self.cover_land_passthrough_checkbox.isChecked():
+            self.landscape.setPixmap(self.attachment_pixmap("cover_land"))
+
+    def attachment_pixmap(self, filename):
+        pixmap = QtGui.QPixmap(str(Path(self.main.path.work) / self.attachments[filename].name))
+        return pixmap.scaled(230, 230, QtCore.Qt.KeepAspectRatio)
+
     def cover_passthrough_check(self):
         checked = self.cover_passthrough_checkbox.isChecked()
         if checked:
+            self.extract_covers()
             self.cover_path.setDisabled(True)
             self.cover_button.setDisabled(True)
-            pixmap = QtGui.QPixmap(str(Path(self.main.path.work) / self.attachments.cover.name))
-            pixmap = pixmap.scaled(230, 230, QtCore.Qt.KeepAspectRatio)
-            self.poster.setPixmap(pixmap)
+            if self.covers_extracted:
+                self.poster.setPixmap(self.attachment_pixmap("cover"))
         else:
             self.cover_path.setDisabled(False)
             self.cover_button.setDisabled(False)
@@ -234,11 +290,11 @@ class CoverPanel(QtWidgets.QWidget):
     def cover_land_passthrough_check(self):
         checked = self.cover_land_passthrough_checkbox.isChecked()
         if checked:
+            self.extract_covers()
             self.cover_land.setDisabled(True)
             self.landscape_button.setDisabled(True)
-            pixmap = QtGui.QPixmap(str(Path(self.main.path.work) / self.attachments.cover_land.name))
-            pixmap = pixmap.scaled(230, 230, QtCore.Qt.KeepAspectRatio)
-            self.landscape.setPixmap(pixmap)
+            if self.covers_extracted:
+                self.landscape.setPixmap(self.attachment_pixmap("cover_land"))
         else:
             self.cover_land.setDisabled(False)
             self.landscape_button.setDisabled(False)
@@ -271,6 +327,9 @@ class CoverPanel(QtWidgets.QWidget):
         self.cover_land_passthrough_checkbox.setDisabled(True)
         self.small_cover_land_passthrough_checkbox.setDisabled(True)
         self.attachments = Box()
+        self.covers_extracted = False
+        self.extraction = None
+        self.source_count += 1
 
         self.poster.setPixmap(QtGui.QPixmap())
         self.landscape.setPixmap(QtGui.QPixmap())
@@ -288,7 +347,6 @@ class CoverPanel(QtWidgets.QWidget):
             if base_name == "cover":
                 self.cover_passthrough_checkbox.setChecked(True)
                 self.cover_passthrough_checkbox.setDisabled(False)
-                self.update_cover(str(Path(self.main.path.work) / filename))
                 self.cover_path.setDisabled(True)
                 self.cover_path.setText("")
                 self.cover_button.setDisabled(True)
@@ -296,7 +354,6 @@ class CoverPanel(QtWidgets.QWidget):
             if base_name == "cover_land":
                 self.cover_land_passthrough_checkbox.setChecked(True)
                 self.cover_land_passthrough_checkbox.setDisabled(False)
-                self.update_landscape_cover(str(Path(self.main.path.work) / filename))
                 self.cover_land.setDisabled(True)
                 self.cover_land.setText("")
                 self.landscape_button.setDisabled(True)
@@ -318,3 +375,6 @@ class CoverPanel(QtWidgets.QWidget):
         self.small_cover_passthrough_checkbox.toggled.connect(lambda: self.small_cover_passthrough_check())
         self.cover_land_passthrough_checkbox.toggled.connect(lambda: self.cover_land_passthrough_check())
         self.small_cover_land_passthrough_checkbox.toggled.connect(lambda: self.small_cover_land_passthrough_check())
+
+        if self.main.video_options.currentWidget() is self:
+            self.extract_covers()
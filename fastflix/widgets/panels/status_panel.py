@@ -1,9 +1,44 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+from datetime import timedelta
 
 from qtpy import QtCore, QtWidgets
 
 
+class JobProgress(QtWidgets.QWidget):
+    """Name, progress bar and speed of a single queued or running job"""
+
+    def __init__(self, parent, name):
+        super().__init__(parent)
+        layout = QtWidgets.QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.name = QtWidgets.QLabel(name)
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_details = QtWidgets.QLabel("")
+        layout.addWidget(self.name)
+        layout.addWidget(self.progress_bar, stretch=1)
+        layout.addWidget(self.progress_details)
+        self.setLayout(layout)
+
+    def update_progress(self, report):
+        if report.get("percent") is not None:
+            self.progress_bar.setValue(int(report["percent"]))
+        details = []
+        if report.get("commands", 0) > 1:
+            details.append(f"command {report['command']} of {report['commands']}")
+        if report.get("fps"):
+            details.append(f"{report['fps']:.1f} fps")
+        if report.get("speed"):
+            details.append(f"{report['speed']:.2f}x")
+        if report.get("bitrate") and report["bitrate"] != "N/A":
+            details.append(report["bitrate"])
+        if report.get("eta") is not None:
+            details.append(f"ETA {timedelta(seconds=int(report['eta']))}")
+        self.progress_details.setText("  |  ".join(details))
+
+
 class StatusPanel(QtWidgets.QWidget):
     def __init__(self, parent, log_queue):
         super().__init__(parent)
@@ -16,8 +51,32 @@ class StatusPanel(QtWidgets.QWidget):
         layout.addWidget(self.hide_nal, 0, 1, QtCore.Qt.AlignRight)
         self.inner_widget = Logs(self, log_queue)
         layout.addWidget(self.inner_widget, 1, 0, 1, 2)
+
+        # A row for each job that is queued or running, by job id, so jobs running side by side each show their own
+        self.jobs = {}
+        self.jobs_layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(self.jobs_layout, 2, 0, 1, 2)
         self.setLayout(layout)
 
+    def add_job(self, job_id, name):
+        self.jobs[job_id] = JobProgress(self, name)
+        self.jobs_layout.addWidget(self.jobs[job_id])
+
+    def remove_job(self, job_id):
+        row = self.jobs.pop(job_id, None)
+        if row:
+            self.jobs_layout.removeWidget(row)
+            row.deleteLater()
+
+    def clear_jobs(self):
+        for job_id in list(self.jobs):
+            self.remove_job(job_id)
+
+    def update_progress(self, report):
+        row = self.jobs.get(report.get("job"))
+        if row:
+            row.update_progress(report)
+
 
 class Logs(QtWidgets.QTextBrowser):
     log_signal = QtCore.Signal(str)
@@ -1,27 +1,237 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import logging
-from subprocess import PIPE, STDOUT, run
+import shlex
+import threading
+from subprocess import PIPE, Popen
 
-import reusables
 from qtpy import QtCore, QtGui, QtWidgets
 
+from fastflix.cache import MemoryCache
+from fastflix.flix import low_priority_options
+
 logger = logging.getLogger("fastflix")
 
-__all__ = ["ThumbnailCreator"]
+__all__ = ["ThumbnailCreator", "PreviewWorker", "ThumbnailScheduler", "FilmstripGenerator"]
 
 
 class ThumbnailCreator(QtCore.QThread):
-    def __init__(self, app, command=""):
+    def __init__(self, app, command="", request_id=0, low_priority=False):
         super().__init__(app)
         self.app = app
         self.command = command
+        self.request_id = request_id
+        self.low_priority = low_priority
+        self.process = None
+        self.cancelled = False
 
     def run(self):
+        if self.cancelled:
+            return
         logger.debug(f"Generating thumbnail: {self.command}")
-        result = run(self.command, stdin=PIPE, stdout=PIPE, stderr=STDOUT, shell=True)
-        if result.returncode > 0:
-            logger.error(f"Could not generate thumbnail: {result.stdout}")
-            self.app.thumbnail_complete.emit(0)
+        options = low_priority_options() if self.low_priority else {}
+        self.process = Popen(shlex.split(self.command), stdin=PIPE, stdout=PIPE, stderr=PIPE, **options)
+        image_data, errors = self.process.communicate()
+        if self.cancelled:
+            return
+        if self.process.returncode > 0 or not image_data:
+            logger.error(f"Could not generate thumbnail: {errors}")
+            self.app.thumbnail_complete.emit(self.request_id, None)
         else:
-            self.app.thumbnail_complete.emit(1)
+            self.app.thumbnail_complete.emit(self.request_id, image_data)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.process and self.process.poll() is None:
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+
+
+class PreviewWorker(QtCore.QThread):
+    """
+    Runs the preview FFmpeg commands of one open source one at a time, on a single thread instead of one per frame.
+    Every preview is still its own FFmpeg run that opens the source and seeks again.
+    Only the newest waiting request is kept, a request that should not wait kills the FFmpeg run it supersedes.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.condition = threading.Condition()
+        self.next_request = None
+        self.process = None
+        self.active = True
+
+    def request(self, request_id, command, kill_running=True):
+        with self.condition:
+            self.next_request = (request_id, command)
+            if kill_running:
+                self._kill()
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.next_request = None
+            self._kill()
+
+    def stop(self):
+        with self.condition:
+            self.active = False
+            self.next_request = None
+            self._kill()
+            self.condition.notify()
+        self.wait()
+
+    def _kill(self):
+        if self.process and self.process.poll() is None:
+            self.process.superseded = True
+            try:
+                self.process.kill()
+            except OSError:
+                pass
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.active and not self.next_request:
+                    self.condition.wait()
+                if not self.active:
+                    return
+                request_id, command = self.next_request
+                self.next_request = None
+                logger.debug(f"Generating thumbnail: {command}")
+                self.process = Popen(shlex.split(command), stdin=PIPE, stdout=PIPE, stderr=PIPE)
+                process = self.process
+            image_data, errors = process.communicate()
+            if getattr(process, "superseded", False):
+                continue
+            if process.returncode > 0 or not image_data:
+                logger.error(f"Could not generate thumbnail: {errors}")
+                image_data = None
+            self.app.thumbnail_complete.emit(request_id, image_data)
+
+
+class ThumbnailScheduler(QtCore.QObject):
+    """
+    Coalesces preview requests that arrive within a short window into a single FFmpeg run on the
+    source's PreviewWorker, kills runs that have been superseded and only reports the newest request's result.
+    Scrub requests skip the wait and are shown as they arrive, as long as they are newer than what is on screen.
+    Frames are read straight from FFmpeg's stdout, and decoded previews are kept in memory
+    so asking for one that was already seen needs no FFmpeg run.
+    """
+
+    thumbnail_complete = QtCore.Signal(int, object)
+    thumbnail_ready = QtCore.Signal(bool, object)
+
+    def __init__(self, parent, delay=200, cache_size=64 * 1024 * 1024):
+        super().__init__(parent)
+        self.request_id = 0
+        self.shown_id = 0
+        self.pending = None
+        self.worker = None
+        self.requests = {}
+        self.cache = MemoryCache(max_size=cache_size, size_of=lambda image: image.sizeInBytes())
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.start_pending)
+        self.thumbnail_complete.connect(self.worker_complete)
+
+    def new_source(self):
+        self.shutdown()
+        self.worker = PreviewWorker(self)
+        self.worker.start()
+
+    def shutdown(self):
+        self.timer.stop()
+        self.pending = None
+        self.requests = {}
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+
+    def request(self, key, command, scrub=False):
+        """
+        Show the preview identified by key, straight from memory if it has been generated before,
+        otherwise schedule the FFmpeg command, which must write a single image to stdout.
+        """
+        self.request_id += 1
+        image = self.cache.get(key)
+        if image is not None:
+            self.cancel()
+            self.shown_id = self.request_id
+            self.thumbnail_ready.emit(True, image)
+            return
+        self.pending = (self.request_id, key, command, scrub)
+        if scrub:
+            self.timer.stop()
+            self.start_pending()
+        else:
+            self.timer.start()
+
+    def start_pending(self):
+        if not self.pending:
+            return
+        if not self.worker:
+            self.new_source()
+        request_id, key, command, scrub = self.pending
+        self.pending = None
+        self.requests[request_id] = (key, scrub)
+        self.worker.request(request_id, command, kill_running=not scrub)
+
+    def cancel(self):
+        self.timer.stop()
+        self.pending = None
+        if self.worker:
+            self.worker.cancel()
+
+    def worker_complete(self, request_id, image_data):
+        key, scrub = self.requests.pop(request_id, (None, False))
+        image = QtGui.QImage.fromData(image_data) if image_data else QtGui.QImage()
+        if not image.isNull() and key:
+            self.cache.set(key, image)
+        if request_id == self.request_id or (scrub and request_id > self.shown_id):
+            self.shown_id = request_id
+            self.thumbnail_ready.emit(not image.isNull(), image)
+
+
+class FilmstripGenerator(QtCore.QObject):
+    """
+    Generates the timeline filmstrip of the open source with a single low priority ThumbnailCreator run.
+    Only the newest request is kept, so changing sources cancels the strip of the previous one.
+    """
+
+    thumbnail_complete = QtCore.Signal(int, object)
+    filmstrip_ready = QtCore.Signal(object, object)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.request_id = 0
+        self.key = None
+        self.worker = None
+        self.thumbnail_complete.connect(self.worker_complete)
+
+    def request(self, key, command):
+        self.cancel()
+        self.request_id += 1
+        self.key = key
+        self.worker = ThumbnailCreator(self, command, self.request_id, low_priority=True)
+        self.worker.start()
+
+    def cancel(self):
+        self.key = None
+        if self.worker:
+            self.worker.cancel()
+            self.worker = None
+
+    def worker_complete(self, request_id, image_data):
+        if request_id != self.request_id or not self.key:
+            return
+        key, self.key, self.worker = self.key, None, None
+        image = QtGui.QImage.fromData(image_data) if image_data else QtGui.QImage()
+        if image.isNull():
+            logger.warning("Could not generate timeline filmstrip")
+            return
+        self.filmstrip_ready.emit(key, image)
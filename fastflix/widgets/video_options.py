@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 import logging
 
-from box import Box, BoxList
 from qtpy import QtCore, QtGui, QtWidgets
 
 from fastflix.widgets.panels.audio_panel import AudioList
@@ -35,6 +34,11 @@ class VideoOptions(QtWidgets.QTabWidget):
         self.addTab(self.attachments, "Cover")
         self.addTab(self.commands, "Command List")
         self.addTab(self.status, "Encoding Status")
+        self.currentChanged.connect(self.tab_changed)
+
+    def tab_changed(self, index):
+        if self.widget(index) is self.attachments:
+            self.attachments.extract_covers()
 
     def change_conversion(self, conversion):
         conversion = conversion.strip()
@@ -53,21 +57,19 @@ class VideoOptions(QtWidgets.QTabWidget):
         self.current_settings.new_source()
         self.main.page_update()
 
-    def get_settings(self):
-        settings = Box()
-        settings.update(self.current_settings.get_settings())
+    def get_sections(self):
+        """Encoder, audio, subtitle and attachment settings, each section gathered separately as plain values"""
+        sections = dict(video=self.current_settings.get_settings().to_dict(), audio={}, subtitles={}, attachments={})
         tracks = 1
         if getattr(self.current_plugin, "enable_audio", False):
-            audio_settings = self.audio.get_settings()
-            tracks += audio_settings.audio_track_count
-            settings.update(audio_settings)
+            sections["audio"] = self.audio.get_settings().to_dict()
+            tracks += sections["audio"]["audio_track_count"]
         if getattr(self.current_plugin, "enable_subtitles", False):
-            subtitle_settings = self.subtitles.get_settings()
-            tracks += subtitle_settings.subtitle_track_count
-            settings.update(subtitle_settings)
+            sections["subtitles"] = self.subtitles.get_settings().to_dict()
+            tracks += sections["subtitles"]["subtitle_track_count"]
         if getattr(self.current_plugin, "enable_attachments", False):
-            settings.update(self.attachments.get_settings(out_stream_start_index=tracks))
-        return settings
+            sections["attachments"] = self.attachments.get_settings(out_stream_start_index=tracks).to_dict()
+        return sections
 
     def new_source(self):
         if getattr(self.current_plugin, "enable_audio", False):